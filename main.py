@@ -1,9 +1,75 @@
+import os
+import queue
+import threading
+import numpy as np
 import tkinter as tk
-from tkinter import messagebox, ttk
+from tkinter import filedialog, messagebox, ttk
 from PIL import Image, ImageTk
 
+from transportation import files, solver
+from transportation.cache import SolutionCache
+from transportation.compare import COMPARE_ALL, STARTING_METHODS
+from transportation.numeric import as_numbers
+from transportation.steps import StepRecorder
+from transportation.trace import Trace, phase
+from transportation.worker import CompareWorker, SolveWorker
+
+# Width in pixels of one step in the Steps tab, and the largest problem (in
+# cells) whose matrices are printed in full for every step
+STEP_WIDTH = 300
+STEP_MATRIX_CELLS = 400
+
+# Milliseconds between checks for progress from the solver thread
+POLL_INTERVAL = 50
+
+# Largest loaded problem (in cells) shown as a grid of entries; bigger ones
+# get a summary instead, and a corner of this many rows and columns
+TABLE_CELLS = 400
+PREVIEW_SIZE = 5
+
+FILE_TYPES = [("Problem files", "*.csv *.npy *.parquet"), ("All files", "*.*")]
+
+class FlowchartImages:
+    # Flowchart images decoded once, on a background thread, with the
+    # PhotoImage for each width kept so showing a flowchart again is free.
+    # PhotoImages belong to Tk, so photo() may only be called from the main
+    # thread; it waits for the image if it is still being decoded.
+    def __init__(self, paths):
+        self.paths = list(paths)
+        self._decoded = {}
+        self._photos = {}
+        self._lock = threading.Lock()
+
+    def start(self):
+        threading.Thread(target=self._decode_all, daemon=True).start()
+
+    def _decode_all(self):
+        for path in self.paths:
+            self._decode(path)
+
+    def _decode(self, path):
+        # The decoded image, or the error opening it, kept for next time
+        with self._lock:
+            if path not in self._decoded:
+                try:
+                    image = Image.open(path)
+                    image.load()
+                except OSError as e:
+                    image = e
+                self._decoded[path] = image
+            return self._decoded[path]
+
+    def photo(self, path, width):
+        key = (path, width)
+        if key not in self._photos:
+            image = self._decode(path)
+            if isinstance(image, Exception):
+                raise image
+            self._photos[key] = ImageTk.PhotoImage(image.resize((width, image.height), Image.LANCZOS))
+        return self._photos[key]
+
 class TransportationProblemSolver:
-    def __init__(self, root):
+    def __init__(self, root, trace_path=None):
         self.root = root
         self.root.title("Transportation Problem Solver")
         self.root.geometry("950x700")  # Set larger screen size
@@ -18,27 +84,63 @@ class TransportationProblemSolver:
         self.steps_canvas = tk.Canvas(self.steps_frame)
         self.steps_canvas.pack(side=tk.LEFT, fill=tk.BOTH, expand=1)
 
-        self.steps_scrollbar = ttk.Scrollbar(self.steps_frame, orient=tk.HORIZONTAL, command=self.steps_canvas.xview)
+        self.steps_scrollbar = ttk.Scrollbar(self.steps_frame, orient=tk.HORIZONTAL, command=self.scroll_steps)
         self.steps_scrollbar.pack(side=tk.BOTTOM, fill=tk.X)
 
+        # Steps are recorded as deltas and only the ones in view are drawn
         self.steps_canvas.configure(xscrollcommand=self.steps_scrollbar.set)
-        self.steps_canvas.bind('<Configure>', lambda e: self.steps_canvas.configure(scrollregion=self.steps_canvas.bbox("all")))
-
-        self.steps_inner_frame = tk.Frame(self.steps_canvas)
-        self.steps_canvas.create_window((0, 0), window=self.steps_inner_frame, anchor="nw")
+        self.steps_canvas.bind('<Configure>', lambda e: self.render_steps())
+        self.steps = None
+        self.worker = None
+        self.problem = None  # Loaded problem too big for the entry grid
+        self.problem_shape = None  # Rows and columns of the last problem solved, before balancing
+        self.solution = None
+        # Optimal solutions of earlier solves, to re-solve edited problems from
+        self.cache = SolutionCache()
+        # Timeline of every solve and its display, saved after each solve
+        self.trace_path = trace_path
+        self.trace = None if trace_path is None else Trace()
 
         self.notebook = ttk.Notebook(self.root)
         self.notebook.pack(expand=1, fill="both")
 
+        # The Algorithm and Flowchart tabs are filled in when first viewed;
+        # until then only what they should show is kept
         self.algorithm_frame = tk.Frame(self.notebook)
         self.notebook.add(self.algorithm_frame, text='Algorithm')
-
-        self.algorithm_text = tk.Text(self.algorithm_frame, wrap=tk.WORD)
-        self.algorithm_text.pack(side=tk.LEFT, fill=tk.BOTH, expand=True)
+        self.algorithm_text = None
+        self.algorithm_description = ""
 
         self.flowchart_frame = tk.Frame(self.notebook)
         self.notebook.add(self.flowchart_frame, text='Flowchart')
+        self.flowchart_canvas = None
+        self.flowchart_path = ""
+        self.notebook.bind('<<NotebookTabChanged>>', self.tab_changed)
+
+        # The images sit next to this file, not in the current directory
+        here = os.path.dirname(os.path.abspath(__file__))
+        self.flowchart_images = {
+            "NorthWest Method": os.path.join(here, "nw.png"),
+            "Least Cost Method": os.path.join(here, "lc.png"),
+            "Vogel's Approximation Method": os.path.join(here, "vam.png")
+        }
+        # Decoded in the background once the window is up
+        self.flowchart_assets = FlowchartImages(self.flowchart_images.values())
+        self.root.after_idle(self.flowchart_assets.start)
+
+        self.create_widgets()
 
+    def tab_changed(self, event):
+        selected = self.notebook.nametowidget(self.notebook.select())
+        if selected is self.algorithm_frame and self.algorithm_text is None:
+            self.algorithm_text = tk.Text(self.algorithm_frame, wrap=tk.WORD)
+            self.algorithm_text.pack(side=tk.LEFT, fill=tk.BOTH, expand=True)
+            self.set_algorithm_text(self.algorithm_description)
+        elif selected is self.flowchart_frame and self.flowchart_canvas is None:
+            self.create_flowchart_tab()
+            self.load_flowchart(self.flowchart_path)
+
+    def create_flowchart_tab(self):
         self.flowchart_canvas = tk.Canvas(self.flowchart_frame)
         self.flowchart_canvas.pack(side=tk.LEFT, fill=tk.BOTH, expand=True)
 
@@ -53,14 +155,6 @@ class TransportationProblemSolver:
         self.flowchart_inner_frame = tk.Frame(self.flowchart_canvas)
         self.flowchart_canvas.create_window((0, 0), window=self.flowchart_inner_frame, anchor="nw")
 
-        self.flowchart_images = {
-            "NorthWest Method": "nw.png",
-            "Least Cost Method": "lc.png",
-            "Vogel's Approximation Method": "vam.png"
-        }
-
-        self.create_widgets()
-
     def create_widgets(self):
         # Number of rows and columns entry
         self.rows_label = tk.Label(self.main_frame, text="Enter number of rows:")
@@ -77,24 +171,50 @@ class TransportationProblemSolver:
         self.submit_btn = ttk.Button(self.main_frame, text="Submit", command=self.submit_dimensions)
         self.submit_btn.pack(anchor="center")
 
+        # Or read the whole problem from a CSV, NPY or Parquet file
+        self.load_btn = ttk.Button(self.main_frame, text="Load from file...", command=self.load_file)
+        self.load_btn.pack(anchor="center", pady=10)
+
     def submit_dimensions(self):
         try:
             self.num_rows = int(self.rows_entry.get())
             self.num_columns = int(self.columns_entry.get())
 
             # Destroy main frame widgets
-            self.rows_label.destroy()
-            self.rows_entry.destroy()
-            self.columns_label.destroy()
-            self.columns_entry.destroy()
-            self.submit_btn.destroy()
+            self.destroy_dimensions()
 
             # Create table
             self.create_table()
         except ValueError:
             messagebox.showerror("Error", "Please enter valid integer values for rows and columns.")
 
-    def create_table(self):
+    def destroy_dimensions(self):
+        self.rows_label.destroy()
+        self.rows_entry.destroy()
+        self.columns_label.destroy()
+        self.columns_entry.destroy()
+        self.submit_btn.destroy()
+        self.load_btn.destroy()
+
+    def load_file(self):
+        path = filedialog.askopenfilename(filetypes=FILE_TYPES)
+        if not path:
+            return
+        try:
+            supply, demand, cost_matrix = files.load_problem(path)
+        except (OSError, ValueError) as e:
+            messagebox.showerror("Error", f"Unable to load {path}: {e}")
+            return
+
+        self.num_rows, self.num_columns = cost_matrix.shape
+        self.destroy_dimensions()
+        self.create_table((supply, demand, cost_matrix))
+
+    def create_table(self, problem=None):
+        if problem is not None and self.num_rows * self.num_columns > TABLE_CELLS:
+            self.create_preview(problem)
+            return
+        self.problem = None
         self.cost_matrix = []
         self.supply = []
         self.demand = []
@@ -127,15 +247,70 @@ class TransportationProblemSolver:
             entry.grid(row=self.num_rows + 2, column=i, padx=5, pady=5)
             self.demand.append(entry)
 
+        if problem is not None:
+            self.fill_table(problem)
+        self.create_controls()
+
+    def fill_table(self, problem):
+        supply, demand, cost_matrix = problem
+        for entries, values in zip(self.cost_matrix, cost_matrix.tolist()):
+            for entry, value in zip(entries, values):
+                if value == value:  # NaN stays blank, a forbidden lane
+                    entry.insert(0, str(int(value)) if isinstance(value, float) and value.is_integer() else str(value))
+        for entry, value in zip(self.supply, supply):
+            entry.insert(0, str(value))
+        for entry, value in zip(self.demand, demand):
+            entry.insert(0, str(value))
+
+    def create_preview(self, problem):
+        # Summary of a large loaded problem in place of the entry grid
+        self.problem = problem
+        self.cost_matrix = []
+        self.supply = []
+        self.demand = []
+        supply, demand, cost_matrix = problem
+
+        self.table_frame = tk.Frame(self.main_frame)
+        self.table_frame.pack(padx=20, pady=20)
+
+        corner = cost_matrix[:PREVIEW_SIZE, :PREVIEW_SIZE].tolist()
+        text = f"{self.num_rows} sources x {self.num_columns} destinations\n"
+        text += f"Total supply: {sum(supply)}, total demand: {sum(demand)}\n\n"
+        text += f"Costs, rows 1-{len(corner)} and columns 1-{len(corner[0])}:\n"
+        text += "\n".join(" ".join(f"{value:>8}" for value in row) for row in corner)
+        self.preview_label = tk.Label(self.table_frame, text=text, font="TkFixedFont", justify=tk.LEFT)
+        self.preview_label.grid(row=0, column=0, columnspan=self.num_columns + 2, pady=(0, 10))
+        self.create_controls()
+
+    def create_controls(self):
+
         # Button to select method
         self.method_var = tk.StringVar()
         self.method_var.set("Select Method")
         self.method_menu = ttk.OptionMenu(self.table_frame, self.method_var, "Select Method", "NorthWest Method", "Least Cost Method",
-                                         "Vogel's Approximation Method")
+                                         "Vogel's Approximation Method", solver.NETWORK_SIMPLEX, COMPARE_ALL)
         self.method_menu.grid(row=self.num_rows + 3, columnspan=self.num_columns + 2, pady=10)
 
+        # Optionally improve the initial solution to an optimal one
+        self.optimize_var = tk.BooleanVar(value=True)
+        self.optimize_check = ttk.Checkbutton(self.table_frame, text="Optimize with MODI", variable=self.optimize_var)
+        self.optimize_check.grid(row=self.num_rows + 4, columnspan=self.num_columns + 2)
+
         self.solve_btn = ttk.Button(self.table_frame, text="Solve", command=self.solve)
-        self.solve_btn.grid(row=self.num_rows + 4, columnspan=self.num_columns + 2, pady=10)
+        self.solve_btn.grid(row=self.num_rows + 5, columnspan=self.num_columns + 2, pady=10)
+
+        # Cancel stops a solve in progress, Reset also discards the table
+        self.cancel_btn = ttk.Button(self.table_frame, text="Cancel", command=self.cancel, state=tk.DISABLED)
+        self.cancel_btn.grid(row=self.num_rows + 6, columnspan=self.num_columns + 2)
+        self.reset_btn = ttk.Button(self.table_frame, text="Reset", command=self.reset)
+        self.reset_btn.grid(row=self.num_rows + 7, columnspan=self.num_columns + 2, pady=10)
+
+        self.progress_label = tk.Label(self.table_frame, text="")
+        self.progress_label.grid(row=self.num_rows + 8, columnspan=self.num_columns + 2)
+
+        self.save_btn = ttk.Button(self.table_frame, text="Save allocation...", command=self.save_allocation,
+                                   state=tk.DISABLED)
+        self.save_btn.grid(row=self.num_rows + 9, columnspan=self.num_columns + 2, pady=10)
 
     def solve(self):
         method = self.method_var.get()
@@ -143,25 +318,149 @@ class TransportationProblemSolver:
         if method == "Select Method":
             messagebox.showerror("Error", "Please select a method.")
             return
-        elif method == "NorthWest Method":
-            min_cost = self.northwest_method(method)
-        elif method == "Least Cost Method":
-            min_cost = self.least_cost_method(method)
-        elif method == "Vogel's Approximation Method":
-            min_cost = self.vogel_approximation_method(method)
 
-        messagebox.showinfo("Result", f"The minimum cost of transportation by {method} is {min_cost}")
-        self.display_algorithm(method)
+        try:
+            self.start_worker(method)
+        except ValueError as e:
+            messagebox.showerror("Error", f"Unable to solve the problem: {e}")
+
+    def start_worker(self, method):
+        # Solve on a background thread so the window stays responsive
+        self.clear_steps()
+
+        self.solution = None
+        self.save_btn.config(state=tk.DISABLED)
+
+        supply, demand, cost_matrix = self.read_problem()
+        self.problem_shape = (len(supply), len(demand))
+        if method != solver.NETWORK_SIMPLEX and solver.has_blanks(cost_matrix):
+            raise ValueError(f"blank costs are only allowed with {solver.NETWORK_SIMPLEX}")
+        # Balance here as well so the Steps tab shows the dummy row/column
+        supply, demand, cost_matrix = solver.Workspace().load(supply, demand, cost_matrix)
+
+        if method == COMPARE_ALL:
+            # Every starting method in its own process; no steps are recorded
+            recorder = None
+            self.worker = CompareWorker(supply, demand, cost_matrix, self.optimize_var.get())
+        else:
+            # Steps of integers too big for int64 are recorded as floats, for display only
+            value_dtype = as_numbers(supply + demand).dtype
+            recorder = StepRecorder(value_dtype=np.float64 if value_dtype == object else value_dtype)
+            optimize = self.optimize_var.get()
+            cache = self.cache if optimize and method in STARTING_METHODS else None
+            self.worker = SolveWorker(supply, demand, cost_matrix, method, recorder, optimize, cache, self.trace)
+        self.worker_steps = (method, recorder, supply, demand, cost_matrix)
+        self.worker.start()
+
+        self.solve_btn.config(state=tk.DISABLED)
+        self.cancel_btn.config(state=tk.NORMAL)
+        self.progress_label.config(text="Solving...")
+        self.root.after(POLL_INTERVAL, self.poll_worker, self.worker)
+
+    def poll_worker(self, worker):
+        if worker is not self.worker:
+            return  # Reset while solving
 
-        # Reset button
-        self.reset_btn = ttk.Button(self.table_frame, text="Reset", command=self.reset)
-        self.reset_btn.grid(row=self.num_rows + 5, columnspan=self.num_columns + 2, pady=10)
+        try:
+            while True:
+                message = worker.messages.get_nowait()
+                if message[0] != "progress":
+                    self.finish_solve(message)
+                    return
+                allocations, supply_left, pivots = message[1:]
+                self.progress_label.config(
+                    text=f"Solving... {allocations} allocations, {supply_left} supply left, {pivots} pivots")
+        except queue.Empty:
+            pass
+        self.root.after(POLL_INTERVAL, self.poll_worker, worker)
+
+    def discard_worker(self, worker, recorder):
+        # The worker may record a last step before it sees the cancel, so its
+        # recorder is only closed once the worker has posted its final message
+        try:
+            while worker.messages.get_nowait()[0] == "progress":
+                pass
+        except queue.Empty:
+            self.root.after(POLL_INTERVAL, self.discard_worker, worker, recorder)
+            return
+        if recorder is not None:
+            recorder.close()
+
+    def finish_solve(self, message):
+        method, recorder, supply, demand, cost_matrix = self.worker_steps
+        self.worker = None
+        self.solve_btn.config(state=tk.NORMAL)
+        self.cancel_btn.config(state=tk.DISABLED)
+
+        if message[0] != "done" and recorder is not None:
+            recorder.close()
+        if message[0] == "cancelled":
+            self.progress_label.config(text="Cancelled.")
+            return
+        if message[0] == "error":
+            self.progress_label.config(text="")
+            messagebox.showerror("Error", f"Unable to solve the problem: {message[1]}")
+            return
+
+        self.progress_label.config(text="")
+        self.save_btn.config(state=tk.NORMAL)
+        if method == COMPARE_ALL:
+            comparison = message[1]
+            self.solution = (comparison.optimized or comparison.best).solution
+            self.show_comparison(comparison)
+            return
+
+        solution = self.solution = message[1]
+        self.show_steps(method, recorder, supply, demand, cost_matrix)
+        if solution.warm_start:
+            messagebox.showinfo("Result", f"The minimum cost of transportation is {solution.total_cost}\n"
+                                          f"(re-solved from the previous optimal solution in {solution.pivots} pivots)")
+        elif solution.optimized:
+            messagebox.showinfo("Result", f"The minimum cost of transportation is {solution.total_cost}\n"
+                                          f"(initial solution by {solution.method}: {solution.initial_cost})")
+        else:
+            messagebox.showinfo("Result", f"The cost of the initial solution by {method} is {solution.total_cost}")
+        with phase(self.trace, "flowchart"):
+            self.display_algorithm(method)
+        self.save_trace()
+
+    def save_trace(self):
+        if self.trace is None:
+            return
+        try:
+            self.trace.save(self.trace_path)
+        except (OSError, ValueError) as e:
+            messagebox.showerror("Error", f"Unable to save the trace: {e}")
+
+    def show_comparison(self, comparison):
+        # Table of cost, iterations and time per method in the Algorithm tab
+        best = comparison.best
+        if comparison.optimized is not None:
+            messagebox.showinfo("Result", f"The minimum cost of transportation is {comparison.optimized.total_cost}\n"
+                                          f"(best initial solution by {best.method}: {best.total_cost})")
+        else:
+            messagebox.showinfo("Result", f"The best initial solution is by {best.method} at {best.total_cost}")
+
+        self.set_algorithm_text("Comparison of the methods:\n\n" + str(comparison))
+        self.load_flowchart("")
+
+    def save_allocation(self):
+        path = filedialog.asksaveasfilename(defaultextension=".csv", filetypes=FILE_TYPES)
+        if not path:
+            return
+        try:
+            # Without the dummy row or column, to match the problem
+            files.save_allocation(path, self.solution.allocation.crop(self.problem_shape))
+        except (OSError, ValueError) as e:
+            messagebox.showerror("Error", f"Unable to save {path}: {e}")
+
+    def cancel(self):
+        if self.worker is not None:
+            self.worker.cancel()
+            self.progress_label.config(text="Cancelling...")
 
     def display_algorithm(self, method):
         # Display algorithm description based on selected method
-        self.algorithm_text.config(state=tk.NORMAL)
-        self.algorithm_text.delete('1.0', tk.END)
-
         if method == "NorthWest Method":
             algorithm_description = (
                 "NorthWest Method Algorithm:\n\n"
@@ -190,24 +489,43 @@ class TransportationProblemSolver:
                 "5. Repeat steps 1-4 until all supply and demand are met."
             )
             flowchart_image_path = self.flowchart_images.get("Vogel's Approximation Method", "")
+        elif method == solver.NETWORK_SIMPLEX:
+            algorithm_description = (
+                "Network Simplex Algorithm:\n\n"
+                "1. Treat sources and destinations as nodes and every allowed lane as an arc; lanes left blank are forbidden.\n"
+                "2. Start from a spanning tree of artificial arcs through an extra root node, priced higher than any real route.\n"
+                "3. Compute node potentials from the tree and find an arc with negative reduced cost.\n"
+                "4. Send as much flow as possible around the cycle that arc closes in the tree, and drop the arc that empties.\n"
+                "5. Repeat steps 3-4 until no arc has a negative reduced cost."
+            )
+            flowchart_image_path = ""
         else:
             algorithm_description = (
                 "Select an algorithm to view its description and flowchart."
             )
             flowchart_image_path = ""
 
-        self.algorithm_text.insert(tk.END, algorithm_description)
-        self.algorithm_text.config(state=tk.DISABLED)
-
+        self.set_algorithm_text(algorithm_description)
         self.load_flowchart(flowchart_image_path)
 
+    def set_algorithm_text(self, text):
+        self.algorithm_description = text
+        if self.algorithm_text is None:
+            return  # Shown when the tab is first viewed
+        self.algorithm_text.config(state=tk.NORMAL)
+        self.algorithm_text.delete('1.0', tk.END)
+        self.algorithm_text.insert(tk.END, text)
+        self.algorithm_text.config(state=tk.DISABLED)
+
     def load_flowchart(self, image_path):
-        # Load and display flowchart image in the flowchart tab
+        # Display the flowchart image in the flowchart tab, once it has been
+        # viewed. Images are decoded and scaled only once per width.
+        self.flowchart_path = image_path
+        if self.flowchart_canvas is None:
+            return
         try:
             if image_path:
-                flowchart_image = Image.open(image_path)
-                resized_image = flowchart_image.resize((self.root.winfo_width(), flowchart_image.height), Image.LANCZOS)
-                self.flowchart_img = ImageTk.PhotoImage(resized_image)
+                self.flowchart_img = self.flowchart_assets.photo(image_path, self.root.winfo_width())
 
                 # Clear previous widgets in flowchart_inner_frame
                 for widget in self.flowchart_inner_frame.winfo_children():
@@ -224,225 +542,90 @@ class TransportationProblemSolver:
         except Exception as e:
             messagebox.showerror("Error", f"Unable to load image: {e}")
 
-    def output(self, supply, demand, cost_matrix, method, allocation):
-        step_frame = tk.Frame(self.steps_inner_frame)
-        step_frame.pack(side=tk.LEFT, padx=10, pady=10)
+    def show_steps(self, method, recorder, supply, demand, cost_matrix):
+        # supply and demand are the balanced values before the first step
+        self.steps = (method, recorder, supply, demand, cost_matrix)
+        self.steps_canvas.configure(scrollregion=(0, 0, STEP_WIDTH * len(recorder), 0))
+        self.steps_canvas.xview_moveto(0)
+        self.render_steps()
+
+    def scroll_steps(self, *args):
+        self.steps_canvas.xview(*args)
+        self.render_steps()
 
-        text_widget = tk.Text(step_frame, wrap=tk.WORD, height=20, width=30)
-        text_widget.pack(expand=1, fill="both")
-        text_widget.insert(tk.END, f"Method: {method}\n")
-        text_widget.insert(tk.END, "Cost Matrix:\n")
+    def render_steps(self):
+        self.steps_canvas.delete("step")
+        if self.steps is None:
+            return
+        recorder = self.steps[1]
+        left = int(self.steps_canvas.canvasx(0))
+        right = int(self.steps_canvas.canvasx(self.steps_canvas.winfo_width()))
+        with phase(self.trace, "render steps"):
+            for k in range(max(0, left // STEP_WIDTH), min(len(recorder), right // STEP_WIDTH + 1)):
+                self.steps_canvas.create_text(k * STEP_WIDTH + 10, 10, anchor="nw", tags="step",
+                                              font="TkFixedFont", width=STEP_WIDTH - 20, text=self.step_text(k))
+
+    def step_text(self, k):
+        method, recorder, supply, demand, cost_matrix = self.steps
+        step = recorder[k]
+        text = f"Method: {method}\n"
+        text += f"Step {k + 1}: allocate {step.amount} to cell ({step.row + 1}, {step.col + 1})\n"
+        if len(supply) * len(demand) > STEP_MATRIX_CELLS:
+            # Too big to print the matrices, just show what changed
+            text += f"Supply left in row {step.row + 1}: {step.supply}\n"
+            text += f"Demand left in column {step.col + 1}: {step.demand}\n"
+            return text
+
+        allocation, supply, demand = recorder.state(k, supply, demand)
+        text += "Cost Matrix:\n"
         for row in cost_matrix:
-            text_widget.insert(tk.END, " ".join(map(str, row)) + "\n")
-        text_widget.insert(tk.END, "Allocation Matrix:\n")
+            text += " ".join(map(str, row)) + "\n"
+        text += "Allocation Matrix:\n"
         for row in allocation:
-            text_widget.insert(tk.END, " ".join(map(str, row)) + "\n")
-        text_widget.insert(tk.END, "Supply:\n")
-        text_widget.insert(tk.END, " ".join(map(str, supply)) + "\n")
-        text_widget.insert(tk.END, "Demand:\n")
-        text_widget.insert(tk.END, " ".join(map(str, demand)) + "\n")
-        text_widget.config(state=tk.DISABLED)
-
-    def balance_problem(self, supply, demand, cost_matrix):
-        total_supply = sum(supply)
-        total_demand = sum(demand)
-        
-        if total_supply < total_demand:
-            supply.append(total_demand - total_supply)
-            cost_matrix.append([0] * len(cost_matrix[0]))
-        elif total_supply > total_demand:
-            for row in cost_matrix:
-                row.append(0)
-            demand.append(total_supply - total_demand)
-
-    def northwest_method(self, method):
-        self.steps_inner_frame.destroy()
-        self.steps_inner_frame = tk.Frame(self.steps_canvas)
-        self.steps_canvas.create_window((0, 0), window=self.steps_inner_frame, anchor="nw")
-        
-        supply = [int(entry.get()) for entry in self.supply]
-        demand = [int(entry.get()) for entry in self.demand]
-        cost_matrix = [[int(entry.get()) for entry in row] for row in self.cost_matrix]
-
-        self.balance_problem(supply, demand, cost_matrix)
-
-        i = j = 0
-        allocation = [[0] * len(demand) for _ in range(len(supply))]
-        total_cost = 0
-
-        while i < len(supply) and j < len(demand):
-            allocated = min(supply[i], demand[j])
-            allocation[i][j] = allocated
-            supply[i] -= allocated
-            demand[j] -= allocated
-            total_cost += allocated * cost_matrix[i][j]
-            if supply[i] == 0:
-                i += 1
-            else:
-                j += 1
-
-            self.output(supply, demand, cost_matrix, method, allocation)
-
-        return total_cost
-
-    def least_cost_method(self, method):
-        self.steps_inner_frame.destroy()
-        self.steps_inner_frame = tk.Frame(self.steps_canvas)
-        self.steps_canvas.create_window((0, 0), window=self.steps_inner_frame, anchor="nw")
-
-        supply = [int(entry.get()) for entry in self.supply]
-        demand = [int(entry.get()) for entry in self.demand]
-        cost_matrix = [[int(entry.get()) for entry in row] for row in self.cost_matrix]
-
-        self.balance_problem(supply, demand, cost_matrix)
-
-        allocation = [[0] * len(demand) for _ in range(len(supply))]
-        total_cost = 0
-
-        while any(supply) and any(demand):
-            min_cost = float('inf')
-            min_cell = (0, 0)
-            for i in range(len(supply)):
-                for j in range(len(demand)):
-                    if supply[i] > 0 and demand[j] > 0 and cost_matrix[i][j] < min_cost:
-                        min_cost = cost_matrix[i][j]
-                        min_cell = (i, j)
-
-            i, j = min_cell
-            allocated = min(supply[i], demand[j])
-            allocation[i][j] = allocated
-            supply[i] -= allocated
-            demand[j] -= allocated
-            total_cost += allocated * cost_matrix[i][j]
-
-            self.output(supply, demand, cost_matrix, method, allocation)
-
-        return total_cost
-
-    def vogel_approximation_method(self, method):
-        self.steps_inner_frame.destroy()
-        self.steps_inner_frame = tk.Frame(self.steps_canvas)
-        self.steps_canvas.create_window((0, 0), window=self.steps_inner_frame, anchor="nw")
-        self.steps_canvas.configure(scrollregion=self.steps_canvas.bbox("all"))
-
-        supply = [int(entry.get()) for entry in self.supply]
-        demand = [int(entry.get()) for entry in self.demand]
-        cost_matrix = [[int(entry.get()) for entry in row] for row in self.cost_matrix]
-
-        self.balance_problem(supply, demand, cost_matrix)
-
-        allocation = [[0] * len(cost_matrix[0]) for _ in range(len(cost_matrix))]
-        new = [[0] * len(cost_matrix[0]) for _ in range(len(cost_matrix))]
-
-        for i in range(len(cost_matrix)):
-            for j in range(len(cost_matrix[0])):
-                allocation[i][j] = 0
-                new[i][j] = cost_matrix[i][j]
-        INF = 10 ** 3
-        n = len(cost_matrix)
-        m = len(cost_matrix[0])
-        ans = 0
-
-        # hepler function for finding the row difference and the column difference
-        def findDiff(grid):
-            rowDiff = []
-            colDiff = []
-            for i in range(len(grid)):
-                arr = grid[i][:]
-                arr.sort()
-                rowDiff.append(arr[1] - arr[0])
-            col = 0
-            while col < len(grid[0]):
-                arr = []
-                for i in range(len(grid)):
-                    arr.append(grid[i][col])
-                arr.sort()
-                col += 1
-                colDiff.append(arr[1] - arr[0])
-            return rowDiff, colDiff
-
-        # loop runs until both the demand and the supply is exhausted
-        while max(supply) != 0 or max(demand) != 0:
-            # finding the row and col difference
-            row, col = findDiff(cost_matrix)
-            # finding the maxiumum element in row difference array
-            maxi1 = max(row)
-            # finding the maxiumum element in col difference array
-            maxi2 = max(col)
-
-            # if the row diff max element is greater than or equal to col diff max element
-            if (maxi1 >= maxi2):
-                for ind, val in enumerate(row):
-                    if (val == maxi1):
-                        # finding the minimum element in grid index where the maximum was found in the row difference
-                        mini1 = min(cost_matrix[ind])
-                        for ind2, val2 in enumerate(cost_matrix[ind]):
-                            if (val2 == mini1):
-                                # calculating the min of supply and demand in that row and col
-                                mini2 = min(supply[ind], demand[ind2])
-                                ans += mini2 * mini1
-                                allocation[ind][ind2] = mini2
-                                # subtracting the min from the supply and demand
-                                supply[ind] -= mini2
-                                demand[ind2] -= mini2
-                                # if demand is smaller then the entire col is assigned max value so that the col is eliminated for the next iteration
-                                if (demand[ind2] == 0):
-                                    for r in range(n):
-                                        cost_matrix[r][ind2] = INF
-                                # if supply is smaller then the entire row is assigned max value so that the row is eliminated for the next iteration
-                                else:
-                                    cost_matrix[ind] = [INF for i in range(m)]
-                                break
-                        break
-            # if the row diff max element is greater than col diff max element
-            else:
-                for ind, val in enumerate(col):
-                    if (val == maxi2):
-                        # finding the minimum element in grid index where the maximum was found in the col difference
-                        mini1 = INF
-                        for j in range(n):
-                            mini1 = min(mini1, cost_matrix[j][ind])
-
-                        for ind2 in range(n):
-                            val2 = cost_matrix[ind2][ind]
-                            if val2 == mini1:
-                                # calculating the min of supply and demand in that row and col
-                                mini2 = min(supply[ind2], demand[ind])
-                                ans += mini2 * mini1
-                                allocation[ind2][ind] = mini2
-                                # subtracting the min from the supply and demand
-                                supply[ind2] -= mini2
-                                demand[ind] -= mini2
-                                # if demand is smaller then the entire col is assigned max value so that the col is eliminated for the next iteration
-                                if (demand[ind] == 0):
-                                    for r in range(n):
-                                        cost_matrix[r][ind] = INF
-                                # if supply is smaller then the entire row is assigned max value so that the row is eliminated for the next iteration
-                                else:
-                                    cost_matrix[ind2] = [INF for i in range(m)]
-                                break
-                        break
-
-            self.output(supply, demand, new, method, allocation)
-
-        return ans
+            text += " ".join(map(str, row)) + "\n"
+        text += "Supply:\n" + " ".join(map(str, supply)) + "\n"
+        text += "Demand:\n" + " ".join(map(str, demand)) + "\n"
+        return text
+
+    def clear_steps(self):
+        if self.steps is not None:
+            self.steps[1].close()
+        self.steps = None
+        self.steps_canvas.delete("step")
+        self.steps_canvas.configure(scrollregion=(0, 0, 0, 0))
+
+    def read_problem(self):
+        if self.problem is not None:
+            supply, demand, cost_matrix = self.problem
+            return list(supply), list(demand), cost_matrix
+        # Numbers follow the rules of CSV files: ints, however large, or floats
+        supply = [files.parse_number(entry.get()) for entry in self.supply]
+        demand = [files.parse_number(entry.get()) for entry in self.demand]
+        # A blank cost marks a forbidden lane, which only Network Simplex supports
+        cost_matrix = [[files.parse_number(entry.get()) for entry in row] for row in self.cost_matrix]
+        return supply, demand, cost_matrix
 
     def reset(self):
+        if self.worker is not None:
+            # Stop the solve in progress; its results are discarded
+            self.worker.cancel()
+            self.discard_worker(self.worker, self.worker_steps[1])
+            self.worker = None
+        self.problem = None
+        self.solution = None
         self.table_frame.destroy()
         self.create_widgets()
-        self.steps_inner_frame.destroy()
-        self.steps_inner_frame = tk.Frame(self.steps_canvas)
-        self.steps_canvas.create_window((0, 0), window=self.steps_inner_frame, anchor="nw")
-        self.steps_canvas.configure(scrollregion=self.steps_canvas.bbox("all"))
-        self.algorithm_text.config(state=tk.NORMAL)
-        self.algorithm_text.delete('1.0', tk.END)
-        self.algorithm_text.config(state=tk.DISABLED)
+        self.clear_steps()
+        self.set_algorithm_text("")
 
         # Reset the flowchart tab
         self.clear_flowchart()
 
     def clear_flowchart(self):
         # Clear the flowchart tab
+        self.flowchart_path = ""
+        if self.flowchart_canvas is None:
+            return
         try:
             # Clear the flowchart canvas
             self.flowchart_canvas.delete(tk.ALL)
@@ -457,10 +640,10 @@ class TransportationProblemSolver:
         except Exception as e:
             messagebox.showerror("Error", f"Unable to reset flowchart: {e}")
 
-def main():
+def main(trace_path=None):
     root = tk.Tk()
     root.resizable(False, False)
-    app = TransportationProblemSolver(root)
+    app = TransportationProblemSolver(root, trace_path)
     root.mainloop()
 
 if __name__ == "__main__":
@@ -0,0 +1,27 @@
+import pytest
+
+from transportation import files
+
+
+def _load(tmp_path, text):
+    path = tmp_path / "problem.csv"
+    path.write_text(text)
+    return files.load_problem(str(path))
+
+
+def test_large_integers_load_exactly(tmp_path):
+    supply, demand, cost_matrix = _load(tmp_path, "1,3,99999999999999999999999\n2,,7\n9007199254741013,3,\n")
+    assert supply == [99999999999999999999999, 7]
+    assert demand == [9007199254741013, 3]
+
+
+def test_fractions_load_as_floats(tmp_path):
+    supply, demand, cost_matrix = _load(tmp_path, "1.5,3,5\n2,4,2.5\n3,4.5,\n")
+    assert supply == [5, 2.5]
+    assert cost_matrix.tolist() == [[1.5, 3.0], [2.0, 4.0]]
+
+
+@pytest.mark.parametrize("text", ["1,3,\n2,4,7\n5,2,\n", "1,3,5\n2,4,7\n5,nan,\n", "1,x,5\n2,4,7\n5,2,\n"])
+def test_blank_amounts_and_bad_numbers_are_rejected(tmp_path, text):
+    with pytest.raises(ValueError):
+        _load(tmp_path, text)
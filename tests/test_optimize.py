@@ -0,0 +1,34 @@
+import pytest
+
+from transportation import solver
+from transportation.generate import random_problem
+
+STARTING_METHODS = (solver.NORTHWEST, solver.LEAST_COST, solver.VOGEL)
+
+# Degenerate problems whose starting solutions leave row 0 and column 0 in
+# different parts of the basis.
+DEGENERATE = [
+    ([12, 2], [2, 0, 12], [[3, 0, 2], [3, 3, 2]]),
+    ([0, 20, 0, 9], [29], [[70], [9], [93], [9]]),
+]
+
+
+@pytest.mark.parametrize("method", STARTING_METHODS)
+@pytest.mark.parametrize("problem", DEGENERATE)
+def test_modi_reaches_optimum_on_degenerate_problems(problem, method):
+    optimum = solver.solve(*problem, solver.NETWORK_SIMPLEX)
+    solution = solver.solve(*problem, method, optimize=True)
+    assert solution.total_cost == optimum.total_cost
+    allocation = solution.allocation.to_dense()
+    assert allocation.sum(axis=1).tolist()[:len(problem[0])] == problem[0]
+
+
+@pytest.mark.parametrize("method", STARTING_METHODS)
+@pytest.mark.parametrize("balanced", [True, False])
+def test_modi_matches_network_simplex_on_small_amounts(method, balanced):
+    # Amounts of 0 to 2 make most starting solutions degenerate.
+    for seed in range(200):
+        problem = random_problem(9, 2, seed, balanced, max_amount=2, max_cost=5)
+        optimum = solver.solve(*problem, solver.NETWORK_SIMPLEX)
+        solution = solver.solve(*problem, method, optimize=True)
+        assert solution.total_cost == optimum.total_cost, seed
@@ -0,0 +1,16 @@
+from .solver import (
+    LEAST_COST,
+    METHODS,
+    NETWORK_SIMPLEX,
+    NORTHWEST,
+    VOGEL,
+    Solution,
+    Workspace,
+    balance_problem,
+    least_cost_method,
+    northwest_method,
+    solve,
+    solve_many,
+    vogel_approximation_method,
+)
+from .lanes import Lanes
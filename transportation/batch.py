@@ -0,0 +1,188 @@
+"""Solve many supply and demand scenarios over one cost matrix.
+
+Weekly or per-product plans often share the depot to customer costs and only
+change the amounts. solve_batch takes the cost matrix once with a stack of
+supply vectors and a stack of demand vectors, one row per scenario:
+
+    solutions = solve_batch(supplies, demands, cost_matrix, method=VOGEL)
+
+Everything that depends on the costs alone is worked out once by
+PreparedCosts and shared by every scenario: the cost array itself, the cell
+order the Least Cost Method walks, the per-line orders Vogel's method takes
+its penalties from (whose first entries are the row and column minima), and
+the lanes Network Simplex runs on. A scenario whose totals don't match is
+balanced with a dummy row or column as usual; the padded costs and their
+orders are prepared once per kind of padding.
+
+Scenarios are checked and balanced as whole arrays. With processes above 1
+they are solved on a process pool, each worker preparing the costs once.
+"""
+
+import multiprocessing
+from concurrent.futures import ProcessPoolExecutor
+
+import numpy as np
+
+from . import solver
+from .lanes import Lanes
+from .least_cost import cell_order, least_cost
+from .network_simplex import solve_lanes
+from .numeric import FLOAT_TOLERANCE, as_numbers
+from .optimize import modi
+from .trace import phase
+from .vogel import line_orders, vogel
+
+# How a scenario is balanced: not at all, or with a dummy row or column.
+BALANCED, DUMMY_ROW, DUMMY_COLUMN = 0, 1, 2
+
+# See compare._CONTEXT.
+_CONTEXT = multiprocessing.get_context("spawn")
+
+# The PreparedCosts of a worker process, set up once by _start_worker.
+_worker_costs = None
+
+
+class PreparedCosts:
+    # Cost-derived structures for one cost matrix, computed on first use and
+    # kept for the next scenario. Only read while solving, so scenarios may
+    # share one instance.
+    def __init__(self, cost_matrix):
+        self.cost = as_numbers(cost_matrix)
+        if self.cost.ndim != 2:
+            raise ValueError("The cost matrix must have two dimensions.")
+        self._padded = {BALANCED: self.cost}
+        self._cell_orders = {}
+        self._line_orders = {}
+        self._lanes = {}
+
+    @property
+    def shape(self):
+        return self.cost.shape
+
+    def padded(self, balance):
+        # The costs with a zero dummy row or column added, as the problem
+        # needs to be balanced.
+        if balance not in self._padded:
+            pad = ((0, 1), (0, 0)) if balance == DUMMY_ROW else ((0, 0), (0, 1))
+            self._padded[balance] = np.pad(self.cost, pad)
+        return self._padded[balance]
+
+    def cell_order(self, balance):
+        if balance not in self._cell_orders:
+            self._cell_orders[balance] = cell_order(self.padded(balance))
+        return self._cell_orders[balance]
+
+    def line_orders(self, balance):
+        if balance not in self._line_orders:
+            self._line_orders[balance] = line_orders(self.padded(balance))
+        return self._line_orders[balance]
+
+    def lanes(self, balance):
+        # Every cell of the padded costs as a lane, NaN costs excepted.
+        if balance not in self._lanes:
+            self._lanes[balance] = Lanes.from_dense(self.padded(balance))
+        return self._lanes[balance]
+
+    def solve(self, supply, demand, balance, method=solver.VOGEL, optimize=False, trace=None):
+        # Solve one scenario; supply and demand already carry the dummy
+        # amount that balance calls for. Returns a solver.Solution.
+        with phase(trace, "solve", method=method):
+            if method == solver.NETWORK_SIMPLEX:
+                allocation, total_cost, pivots = solve_lanes(supply, demand, self.lanes(balance), trace=trace)
+                return solver.Solution(method, allocation, total_cost, pivots, optimized=True)
+
+            cost = self.padded(balance)
+            with phase(trace, method):
+                if method == solver.LEAST_COST:
+                    allocation, total_cost, iterations = least_cost(supply, demand, cost, trace=trace,
+                                                                    order=self.cell_order(balance))
+                elif method == solver.VOGEL:
+                    allocation, total_cost, iterations = vogel(supply, demand, cost, trace=trace,
+                                                               orders=self.line_orders(balance))
+                else:
+                    allocation, total_cost, iterations = solver.METHODS[method](
+                        supply.tolist(), demand.tolist(), cost, trace=trace)
+            if not optimize:
+                return solver.Solution(method, allocation, total_cost, iterations)
+
+            initial_cost = total_cost
+            with phase(trace, "MODI"):
+                allocation, total_cost, pivots, basis = modi(cost, allocation, trace=trace)
+            return solver.Solution(method, allocation, total_cost, iterations, initial_cost, pivots, basis)
+
+
+def balance_scenarios(supplies, demands, shape):
+    # Check a stack of scenarios against a cost matrix of the given shape
+    # and balance them all at once. Returns the supplies and demands, each
+    # with one extra column for a dummy amount, and the balance of every
+    # scenario.
+    supplies = as_numbers(supplies)
+    demands = as_numbers(demands)
+    n, m = shape
+    if supplies.ndim != 2 or demands.ndim != 2:
+        raise ValueError("Supplies and demands must be stacked as one row per scenario.")
+    if len(supplies) != len(demands):
+        raise ValueError(f"There are {len(supplies)} supply rows but {len(demands)} demand rows.")
+    if supplies.shape[1] != n:
+        raise ValueError(f"Cost matrix has {n} rows but each scenario has {supplies.shape[1]} supplies.")
+    if demands.shape[1] != m:
+        raise ValueError(f"Cost matrix has {m} columns but each scenario has {demands.shape[1]} demands.")
+    if any(values.dtype.kind == "f" and not np.isfinite(values).all() for values in (supplies, demands)):
+        raise ValueError("Supply and demand must be finite numbers.")
+    if (supplies < 0).any() or (demands < 0).any():
+        raise ValueError("Supply and demand must be non-negative.")
+
+    difference = demands.sum(axis=1) - supplies.sum(axis=1)
+    if difference.dtype.kind == "f":
+        # Float rounding alone doesn't call for a dummy line, see numeric.shortfall
+        largest = np.maximum(1.0, np.maximum(np.abs(supplies).max(axis=1), np.abs(demands).max(axis=1)))
+        difference[np.abs(difference) <= FLOAT_TOLERANCE * largest] = 0
+    balance = np.where(difference > 0, DUMMY_ROW, np.where(difference < 0, DUMMY_COLUMN, BALANCED))
+    supplies = np.concatenate([supplies, np.maximum(difference, 0)[:, None]], axis=1)
+    demands = np.concatenate([demands, np.maximum(-difference, 0)[:, None]], axis=1)
+    return supplies, demands, balance
+
+
+def _scenario(supplies, demands, balance, k):
+    # Scenario k without the unused dummy entries.
+    supply = supplies[k] if balance[k] == DUMMY_ROW else supplies[k, :-1]
+    demand = demands[k] if balance[k] == DUMMY_COLUMN else demands[k, :-1]
+    return supply.copy(), demand.copy(), int(balance[k])
+
+
+def _start_worker(cost_matrix):
+    global _worker_costs
+    _worker_costs = PreparedCosts(cost_matrix)
+
+
+def _solve_chunk(supplies, demands, balance, method, optimize):
+    return [_worker_costs.solve(*_scenario(supplies, demands, balance, k), method, optimize)
+            for k in range(len(balance))]
+
+
+def solve_batch(supplies, demands, cost_matrix, method=solver.VOGEL, optimize=False, processes=1, trace=None):
+    # Solve every scenario (supplies[k], demands[k]) over the same costs and
+    # return their Solutions in order. cost_matrix may be a PreparedCosts to
+    # reuse its structures between calls. With processes above 1 the
+    # scenarios are split between that many worker processes; a trace is
+    # only kept when solving in this process.
+    if method not in solver.METHODS:
+        raise ValueError(f"Unknown method: {method!r}")
+    prepared = cost_matrix if isinstance(cost_matrix, PreparedCosts) else PreparedCosts(cost_matrix)
+    if method != solver.NETWORK_SIMPLEX and solver.has_blanks(prepared.cost):
+        raise ValueError(f"Blank costs are only allowed with the {solver.NETWORK_SIMPLEX} method.")
+    with phase(trace, "balance"):
+        supplies, demands, balance = balance_scenarios(supplies, demands, prepared.shape)
+    count = len(balance)
+
+    if processes is None or processes <= 1 or count <= 1:
+        return [prepared.solve(*_scenario(supplies, demands, balance, k), method, optimize, trace)
+                for k in range(count)]
+
+    processes = min(processes, count)
+    bounds = np.linspace(0, count, processes + 1).astype(int)
+    with ProcessPoolExecutor(max_workers=processes, mp_context=_CONTEXT, initializer=_start_worker,
+                             initargs=(prepared.cost,)) as pool:
+        chunks = [pool.submit(_solve_chunk, supplies[lo:hi], demands[lo:hi], balance[lo:hi], method, optimize)
+                  for lo, hi in zip(bounds[:-1], bounds[1:])]
+        return [solution for chunk in chunks for solution in chunk.result()]
@@ -0,0 +1,92 @@
+"""Benchmarks of the solving methods on generated problems.
+
+Every combination of size, density, balance and seed is generated with
+generate.random_problem and solved by each method. A result records the
+wall time, the peak memory allocated while solving (measured in a second,
+traced run so that tracing doesn't slow down the timed one), the iteration
+and pivot counts, and the gap to the optimum found by Network Simplex.
+
+The dense methods only run on dense problems; sparse problems are solved by
+Network Simplex alone. Results are plain dicts of FIELDS, so runs can be
+saved as JSON lines or CSV and compared between versions.
+"""
+
+import time
+import tracemalloc
+
+from . import solver
+from .generate import random_problem
+
+FIELDS = ["instance", "rows", "columns", "density", "balanced", "seed", "method", "optimize", "total_cost",
+          "optimum", "gap", "iterations", "pivots", "seconds", "peak_memory", "error"]
+
+SIZES = (10, 100, 1000)
+DENSITIES = (1.0, 0.05)
+METHODS = (solver.NORTHWEST, solver.LEAST_COST, solver.VOGEL, solver.NETWORK_SIMPLEX)
+
+# Largest dense problem (in cells) whose optimum is computed for the gap;
+# beyond it the exact solve would dominate the run.
+EXACT_CELLS = 1 << 20
+
+
+def _instance(rows, columns, density, balanced, seed):
+    kind = "dense" if density >= 1 else f"sparse{density:g}"
+    return f"{kind}-{'balanced' if balanced else 'unbalanced'}-{rows}x{columns}-seed{seed}"
+
+
+def _measure(problem, method, optimize, memory):
+    supply, demand, cost_matrix = problem
+    start = time.perf_counter()
+    solution = solver.solve(supply, demand, cost_matrix, method, optimize=optimize)
+    seconds = time.perf_counter() - start
+
+    peak = None
+    if memory:
+        tracemalloc.start()
+        try:
+            solver.solve(supply, demand, cost_matrix, method, optimize=optimize)
+            peak = tracemalloc.get_traced_memory()[1]
+        finally:
+            tracemalloc.stop()
+    return solution, seconds, peak
+
+
+def run_case(rows, columns, density=1.0, balanced=True, seed=0, methods=METHODS, optimize=False, memory=True):
+    # Generate one problem and yield a result for each method that applies.
+    sparse = density < 1
+    methods = [method for method in methods if not sparse or method == solver.NETWORK_SIMPLEX]
+    if not methods:
+        return
+    problem = random_problem(rows, columns, seed, balanced, density)
+    base = dict.fromkeys(FIELDS)
+    base.update(instance=_instance(rows, columns, density, balanced, seed), rows=rows, columns=columns,
+                density=density, balanced=balanced, seed=seed)
+
+    optimum = None
+    if sparse or rows * columns <= EXACT_CELLS:
+        optimum = solver.solve(*problem, solver.NETWORK_SIMPLEX).total_cost
+
+    for method in methods:
+        result = dict(base, method=method, optimize=optimize and method != solver.NETWORK_SIMPLEX,
+                      optimum=optimum)
+        try:
+            solution, seconds, peak = _measure(problem, method, result["optimize"], memory)
+        except (MemoryError, ValueError) as e:
+            result["error"] = str(e)
+            yield result
+            continue
+        result.update(total_cost=solution.total_cost, iterations=solution.iterations, pivots=solution.pivots,
+                      seconds=seconds, peak_memory=peak)
+        if optimum:
+            result["gap"] = (solution.total_cost - optimum) / optimum
+        yield result
+
+
+def run_benchmark(sizes=SIZES, densities=DENSITIES, seeds=(0,), methods=METHODS, optimize=False, memory=True):
+    # Square problems of each size, balanced and unbalanced, for every
+    # density and seed. Yields results as they are measured.
+    for size in sizes:
+        for density in densities:
+            for balanced in (True, False):
+                for seed in seeds:
+                    yield from run_case(size, size, density, balanced, seed, methods, optimize, memory)
@@ -0,0 +1,216 @@
+"""Cache of optimal solutions for problems that are edited and re-solved.
+
+Solutions are kept in least-recently-used order under the starting method
+and a hash of the problem, so solving an unchanged problem again with the
+same method is a lookup. When a problem isn't in the cache but one of the
+same size is, the optimal allocation of the most
+recent one is repaired to fit the new supplies and demands and MODI carries
+on from there, reusing the old basis. After a small edit that takes a few
+pivots instead of a whole new solve.
+"""
+
+import hashlib
+import threading
+from collections import OrderedDict, namedtuple
+
+import numpy as np
+
+from . import solver
+from .compare import STARTING_METHODS
+from .least_cost import least_cost
+from .numeric import total_cost
+from .optimize import modi
+from .trace import phase
+
+DEFAULT_CAPACITY = 16
+
+_Entry = namedtuple("_Entry", "allocation basis solution")
+
+
+def problem_key(supply, demand, cost_matrix):
+    # Hash of the problem's values, types and shape. Object arrays, such as
+    # integers too large for int64, are hashed by value.
+    digest = hashlib.blake2b(digest_size=16)
+    for values in (supply, demand, cost_matrix):
+        array = np.ascontiguousarray(values)
+        digest.update(f"{array.dtype.str}{array.shape}".encode())
+        if array.dtype == object:
+            items = array.tolist()
+            if any(item is None or item != item for item in array.ravel().tolist()):
+                raise ValueError("Problems with blank costs can't be cached.")
+            digest.update(repr(items).encode())
+        else:
+            if array.dtype.kind == "f" and np.isnan(array).any():
+                raise ValueError("Problems with blank costs can't be cached.")
+            digest.update(array)
+    return digest.hexdigest()
+
+
+class SolutionCache:
+    # Safe to share between threads; solves through one cache run one at a
+    # time. Cached solutions are shared, so don't modify them.
+    def __init__(self, capacity=DEFAULT_CAPACITY):
+        self.capacity = capacity
+        self.hits = 0
+        self.warm_starts = 0
+        self.misses = 0
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+
+    def __len__(self):
+        return len(self._entries)
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+
+    def solve(self, supply, demand, cost_matrix, method=solver.VOGEL, on_step=None, on_pivot=None, trace=None):
+        # Optimal solution of the problem, as solver.solve with optimize=True.
+        # method only gives the starting solution when nothing of the same
+        # size is cached; on_step is only called in that case.
+        if method not in STARTING_METHODS:
+            raise ValueError(f"Only {', '.join(STARTING_METHODS)} solutions can be cached.")
+        # Each method's solution is kept apart, as it reports its own
+        # starting cost and steps
+        key = (method, problem_key(supply, demand, cost_matrix))
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None:
+                self._entries.move_to_end(key)
+                self.hits += 1
+                return entry.solution
+
+            balanced = solver.Workspace().load(supply, demand, cost_matrix)
+            cost = np.asarray(balanced[2])
+            previous = next((entry for entry in reversed(self._entries.values())
+                             if entry.allocation.shape == cost.shape), None)
+            if previous is None:
+                solution = solver.solve(supply, demand, cost_matrix, method, on_step, optimize=True,
+                                        on_pivot=on_pivot, trace=trace)
+                self.misses += 1
+            else:
+                with phase(trace, "warm start"):
+                    solution = _warm_start(previous, balanced[0], balanced[1], cost, method, on_pivot, trace)
+                self.warm_starts += 1
+
+            self._entries[key] = _Entry(solution.allocation, solution.basis, solution)
+            if len(self._entries) > self.capacity:
+                self._entries.popitem(last=False)
+            return solution
+
+
+def _warm_start(previous, supply, demand, cost, method, on_pivot, trace):
+    supply = np.asarray(supply)
+    demand = np.asarray(demand)
+    # Repaired on a dense copy; the cache itself only keeps Lanes.
+    allocation = previous.allocation.to_dense()
+    allocation = allocation.astype(np.result_type(allocation, supply, demand))
+
+    # Take back what rows and columns now have too much of, from their most
+    # expensive cells first, then place what is missing with the Least Cost
+    # Method over the rows and columns that are short.
+    _trim(allocation, cost, supply)
+    _trim(allocation.T, cost.T, demand)
+    rows = np.flatnonzero(supply - allocation.sum(axis=1))
+    cols = np.flatnonzero(demand - allocation.sum(axis=0))
+    iterations = 0
+    if len(rows):
+        extra, _, iterations = least_cost(supply[rows] - allocation[rows].sum(axis=1),
+                                          demand[cols] - allocation[:, cols].sum(axis=0), cost[np.ix_(rows, cols)])
+        allocation[rows[extra.rows], cols[extra.cols]] += extra.values
+
+    _cancel_cycles(allocation, cost)
+    used = np.nonzero(allocation)
+    initial_cost = total_cost(*used, allocation[used], cost)
+
+    # The allocated cells go first, then the old basis fills in the rest.
+    basis = list(zip(*used))
+    basis += [cell for cell in previous.basis if not allocation[cell]]
+    allocation, optimal_cost, pivots, basis = modi(cost, allocation, basis, on_pivot, trace)
+    return solver.Solution(method, allocation, optimal_cost, iterations, initial_cost, pivots, basis,
+                           warm_start=True)
+
+
+def _trim(allocation, cost, limits):
+    # Lower each row's allocation to at most its limit, in place.
+    excess = allocation.sum(axis=1) - limits
+    for i in np.flatnonzero(excess > 0):
+        cells = np.flatnonzero(allocation[i])
+        for j in cells[np.argsort(-cost[i, cells], kind="stable")]:
+            taken = min(allocation[i, j], excess[i])
+            allocation[i, j] -= taken
+            excess[i] -= taken
+            if not excess[i]:
+                break
+
+
+def _cancel_cycles(allocation, cost):
+    # Turn a feasible allocation into a basic one without raising its cost.
+    # Cells are added to a forest one at a time; a cell that closes a cycle
+    # has flow pushed round it in the direction that doesn't cost more, until
+    # some cell on the cycle empties and is dropped. Swapping one cycle edge
+    # for another leaves the components unchanged, so union-find still holds.
+    n, m = allocation.shape
+    roots = list(range(n + m))
+    adj = [set() for _ in range(n + m)]
+
+    def find(x):
+        while roots[x] != x:
+            roots[x] = roots[roots[x]]
+            x = roots[x]
+        return x
+
+    def cell(a, b):
+        return (a, b - n) if a < n else (b, a - n)
+
+    for i, j in zip(*np.nonzero(allocation)):
+        i, j = int(i), int(j)
+        a, b = find(i), find(n + j)
+        if a != b:
+            roots[a] = b
+            adj[i].add(n + j)
+            adj[n + j].add(i)
+            continue
+
+        # The path from row i to column j alternates cells that lose and gain
+        # flow when (i, j) gains.
+        path = _path(adj, i, n + j)
+        losing = [cell(*edge) for edge in path[::2]]
+        gaining = [cell(*edge) for edge in path[1::2]]
+        delta = cost[i, j] - sum(cost[c] for c in losing) + sum(cost[c] for c in gaining)
+        if delta > 0:
+            losing, gaining = gaining + [(i, j)], losing
+        else:
+            gaining = gaining + [(i, j)]
+        theta = min(allocation[c] for c in losing)
+        for c in losing:
+            allocation[c] -= theta
+        for c in gaining:
+            allocation[c] += theta
+
+        emptied = next(c for c in losing if not allocation[c])
+        if emptied != (i, j):
+            r, k = emptied
+            adj[r].discard(n + k)
+            adj[n + k].discard(r)
+            adj[i].add(n + j)
+            adj[n + j].add(i)
+
+
+def _path(adj, start, goal):
+    # Edges of the forest path from start to goal.
+    parent = {start: None}
+    queue = [start]
+    for node in queue:
+        if node == goal:
+            break
+        for other in adj[node]:
+            if other not in parent:
+                parent[other] = node
+                queue.append(other)
+    edges = []
+    node = goal
+    while parent[node] is not None:
+        edges.append((parent[node], node))
+        node = parent[node]
+    return edges[::-1]
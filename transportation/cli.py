@@ -0,0 +1,192 @@
+"""Command line interface for solving problem files without the GUI.
+
+    python -m transportation solve --method vam problems/*.csv --jobs 8
+
+Each file is loaded and solved in a worker process and one result is written
+per file, in the order the files were given, as JSON lines or CSV.
+
+    python -m transportation benchmark --sizes 10 100 1000 5000
+
+runs the solving methods on generated problems, see benchmark.py. Only
+``python -m transportation gui`` imports tkinter and Pillow. ``--trace FILE``
+on solve and gui saves where the time went, see trace.py.
+"""
+
+import argparse
+import csv
+import json
+import os
+import sys
+import time
+from concurrent.futures import ProcessPoolExecutor
+
+from . import benchmark, files, solver, stream
+from .trace import TRACE_FORMATS, Trace, phase
+
+METHOD_NAMES = {
+    "nw": solver.NORTHWEST,
+    "lc": solver.LEAST_COST,
+    "vam": solver.VOGEL,
+    "ns": solver.NETWORK_SIMPLEX,
+}
+
+FIELDS = ["file", "method", "rows", "columns", "total_cost", "initial_cost", "iterations", "pivots",
+          "optimized", "load_seconds", "solve_seconds", "error"]
+
+
+def solve_file(path, method, optimize=False, allocations=None, trace=None, streamed=False):
+    # Solve one problem file and return its result as a dict of FIELDS. With
+    # allocations, a directory, the allocation is also saved there in the
+    # format of the problem file. streamed solves with stream.solve_stream.
+    # Errors are reported in the result.
+    result = dict.fromkeys(FIELDS)
+    result.update(file=path, method=method)
+    try:
+        start = time.perf_counter()
+        with phase(trace, "load", file=path):
+            supply, demand, cost_matrix = files.load_problem(path)
+        loaded = time.perf_counter()
+        if streamed:
+            solution = stream.solve_stream(supply, demand, cost_matrix, method, trace=trace)
+        else:
+            solution = solver.solve(supply, demand, cost_matrix, method, optimize=optimize, trace=trace)
+        solved = time.perf_counter()
+    except Exception as e:  # One bad file mustn't end the whole batch
+        result["error"] = _error(e)
+        return result
+
+    result.update(rows=len(supply), columns=len(demand), total_cost=solution.total_cost,
+                  initial_cost=solution.initial_cost, iterations=solution.iterations, pivots=solution.pivots,
+                  optimized=solution.optimized, load_seconds=loaded - start, solve_seconds=solved - loaded)
+    if allocations is not None:
+        # Saved without the dummy row or column, to match the problem file
+        name, extension = os.path.splitext(os.path.basename(path))
+        try:
+            with phase(trace, "save allocation", file=path):
+                files.save_allocation(os.path.join(allocations, name + ".allocation" + extension),
+                                      solution.allocation.crop((len(supply), len(demand))))
+        except Exception as e:
+            result["error"] = _error(e)
+    return result
+
+
+def _error(e):
+    # Expected errors by their message, anything else with its type too.
+    return str(e) if isinstance(e, (OSError, ValueError)) else f"{type(e).__name__}: {e}"
+
+
+def _solve_all(paths, method, optimize, allocations, jobs, trace=None, streamed=False):
+    if jobs == 1:
+        return (solve_file(path, method, optimize, allocations, trace, streamed) for path in paths)
+    pool = ProcessPoolExecutor(max_workers=jobs)
+    count = len(paths)
+    results = pool.map(solve_file, paths, [method] * count, [optimize] * count, [allocations] * count,
+                       [None] * count, [streamed] * count)
+    return _closing(results, pool)
+
+
+def _closing(results, pool):
+    with pool:
+        yield from results
+
+
+def _write(results, output, output_format, fields=FIELDS):
+    # Write each result as soon as it is ready. Returns the number of
+    # results with an error.
+    failed = 0
+    if output_format == "csv":
+        writer = csv.DictWriter(output, fields)
+        writer.writeheader()
+    for result in results:
+        if result["error"] is not None:
+            failed += 1
+        if output_format == "csv":
+            writer.writerow(result)
+        else:
+            output.write(json.dumps(result) + "\n")
+        output.flush()
+    return failed
+
+
+def _parser():
+    parser = argparse.ArgumentParser(prog="python -m transportation",
+                                     description="Solve transportation problems.")
+    commands = parser.add_subparsers(dest="command", required=True)
+
+    solve = commands.add_parser("solve", help="solve problem files (CSV, NPY or Parquet)")
+    solve.add_argument("paths", nargs="+", metavar="FILE")
+    solve.add_argument("--method", choices=METHOD_NAMES, default="vam",
+                       help="nw, lc, vam or ns (network simplex); default vam")
+    solve.add_argument("--optimize", action="store_true", help="improve the initial solution with MODI")
+    solve.add_argument("--jobs", type=int, default=1, help="number of files solved at once")
+    solve.add_argument("--format", choices=("json", "csv"), default="json",
+                       help="one JSON object per line, or CSV with a header")
+    solve.add_argument("--output", help="write the results here instead of to standard output")
+    solve.add_argument("--allocations", metavar="DIR", help="also save each allocation in this directory")
+    solve.add_argument("--stream", action="store_true",
+                       help="read the costs in blocks instead of all at once (nw, lc and vam; best with .npy)")
+    solve.add_argument("--trace", metavar="FILE",
+                       help="save a timeline of the solves (.json, Chrome trace) or a profile (.prof)")
+
+    bench = commands.add_parser("benchmark", help="time the methods on generated problems")
+    bench.add_argument("--sizes", type=int, nargs="+", default=benchmark.SIZES,
+                       help="rows and columns of the square problems")
+    bench.add_argument("--densities", type=float, nargs="+", default=benchmark.DENSITIES,
+                       help="share of lanes kept; below 1 only ns is run")
+    bench.add_argument("--seeds", type=int, nargs="+", default=[0])
+    bench.add_argument("--methods", choices=METHOD_NAMES, nargs="+", default=list(METHOD_NAMES))
+    bench.add_argument("--optimize", action="store_true", help="improve the initial solutions with MODI")
+    bench.add_argument("--no-memory", dest="memory", action="store_false",
+                       help="skip the traced run that measures peak memory")
+    bench.add_argument("--format", choices=("json", "csv"), default="json")
+    bench.add_argument("--output", help="write the results here instead of to standard output")
+
+    gui = commands.add_parser("gui", help="open the graphical interface")
+    gui.add_argument("--trace", metavar="FILE", help="save a timeline of every solve and its display")
+    return parser
+
+
+def main(argv=None):
+    args = _parser().parse_args(argv)
+    if getattr(args, "trace", None) is not None and os.path.splitext(args.trace)[1].lower() not in TRACE_FORMATS:
+        _parser().error(f"--trace must end in one of {', '.join(TRACE_FORMATS)}")
+    if args.command == "gui":
+        # Imported only here: tkinter and Pillow are slow to load. main.py
+        # lives next to the package, whatever the current directory.
+        sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+        from main import main as gui
+        gui(args.trace)
+        return 0
+
+    if args.command == "benchmark":
+        methods = [METHOD_NAMES[name] for name in args.methods]
+        results = benchmark.run_benchmark(args.sizes, args.densities, args.seeds, methods, args.optimize,
+                                          args.memory)
+        return _output(results, args.output, args.format, benchmark.FIELDS)
+
+    if args.jobs < 1:
+        _parser().error("--jobs must be at least 1")
+    if args.trace is not None and args.jobs > 1:
+        # Traces live in the process that solves
+        _parser().error("--trace only works with --jobs 1")
+    if args.allocations is not None:
+        os.makedirs(args.allocations, exist_ok=True)
+    method = METHOD_NAMES[args.method]
+    if args.stream and (method not in stream.STREAM_METHODS or args.optimize):
+        _parser().error("--stream only works with nw, lc and vam, without --optimize")
+    trace = None if args.trace is None else Trace()
+    results = _solve_all(args.paths, method, args.optimize, args.allocations, min(args.jobs, len(args.paths)),
+                         trace, args.stream)
+    status = _output(results, args.output, args.format)
+    if trace is not None:
+        trace.save(args.trace)
+    return status
+
+
+def _output(results, path, output_format, fields=FIELDS):
+    if path is None:
+        failed = _write(results, sys.stdout, output_format, fields)
+    else:
+        with open(path, "w", newline="") as output:
+            failed = _write(results, output, output_format, fields)
+    return 1 if failed else 0
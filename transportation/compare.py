@@ -0,0 +1,90 @@
+"""Solve one problem with several methods at once on a process pool.
+
+Each starting method runs in its own process and is timed there. The
+cheapest starting solution is then handed to MODI, so the optimization phase
+starts from the best basis any method found.
+"""
+
+import multiprocessing
+import time
+from collections import namedtuple
+
+from . import solver
+from .optimize import modi
+
+COMPARE_ALL = "Compare all"
+STARTING_METHODS = (solver.NORTHWEST, solver.LEAST_COST, solver.VOGEL)
+
+# Seconds between checks of the cancel event while waiting on the pool.
+CANCEL_CHECK = 0.1
+
+# Worker processes are spawned rather than forked so that they don't inherit
+# the GUI's Tk connection or the threads of the calling process.
+_CONTEXT = multiprocessing.get_context("spawn")
+
+MethodResult = namedtuple("MethodResult", "method total_cost iterations seconds solution")
+
+
+class Comparison:
+    # results holds one MethodResult per starting method, in the order they
+    # were asked for. optimized is the MethodResult of MODI started from the
+    # best of them, or None if no optimization was asked for.
+    def __init__(self, results, optimized=None):
+        self.results = results
+        self.optimized = optimized
+
+    @property
+    def best(self):
+        return min(self.results, key=lambda result: result.total_cost)
+
+    def table(self):
+        rows = list(self.results)
+        if self.optimized is not None:
+            rows.append(self.optimized)
+        return [(row.method, row.total_cost, row.iterations, row.seconds) for row in rows]
+
+    def __str__(self):
+        rows = [("Method", "Cost", "Iterations", "Time (s)")]
+        rows += [(method, str(cost), str(iterations), f"{seconds:.3f}")
+                 for method, cost, iterations, seconds in self.table()]
+        widths = [max(len(row[k]) for row in rows) for k in range(4)]
+        return "\n".join("  ".join(cell.ljust(width) for cell, width in zip(row, widths)).rstrip()
+                         for row in rows)
+
+
+def _timed_solve(supply, demand, cost_matrix, method):
+    start = time.perf_counter()
+    solution = solver.solve(supply, demand, cost_matrix, method)
+    return MethodResult(method, solution.total_cost, solution.iterations, time.perf_counter() - start, solution)
+
+
+def compare(supply, demand, cost_matrix, methods=STARTING_METHODS, optimize=True, processes=None, cancel=None):
+    # cancel, if given, is a threading.Event; setting it makes compare raise
+    # solver.Cancelled. The worker processes are terminated on the way out,
+    # so solves still running when cancelled stop at once.
+    with _CONTEXT.Pool(processes or len(methods)) as pool:
+        pending = [pool.apply_async(_timed_solve, (supply, demand, cost_matrix, method)) for method in methods]
+        for result in pending:
+            while not result.ready():
+                if cancel is not None and cancel.is_set():
+                    raise solver.Cancelled()
+                result.wait(CANCEL_CHECK)
+        results = [result.get() for result in pending]
+
+    comparison = Comparison(results)
+    if optimize:
+        comparison.optimized = _optimize_best(supply, demand, cost_matrix, comparison.best, cancel)
+    return comparison
+
+
+def _optimize_best(supply, demand, cost_matrix, best, cancel):
+    def on_pivot(pivots):
+        if cancel is not None and cancel.is_set():
+            raise solver.Cancelled()
+
+    start = time.perf_counter()
+    _, _, cost_matrix = solver.Workspace().load(supply, demand, cost_matrix)
+    allocation, total_cost, pivots, basis = modi(cost_matrix, best.solution.allocation, on_pivot=on_pivot)
+    solution = solver.Solution(best.method, allocation, total_cost, best.iterations,
+                               best.total_cost, pivots, basis)
+    return MethodResult(f"MODI from {best.method}", total_cost, pivots, time.perf_counter() - start, solution)
@@ -0,0 +1,219 @@
+"""Reading and writing problems and allocations as CSV, NPY or Parquet.
+
+A problem is stored as one table laid out like the input grid of the GUI:
+the cost matrix, with each source's supply at the end of its row and the
+demand of every destination in an extra row at the bottom. The bottom-right
+cell is left blank. A blank cost marks a forbidden lane and is read as NaN.
+
+    8,6,10,20
+    9,12,13,30
+    10,25,15,
+
+An allocation is stored as a plain matrix in the same formats. The format is
+chosen by the file extension.
+
+CSV files are read one line at a time and .npy files are memory-mapped, so
+the cost matrix of a large problem is never held as Python objects. Parquet
+support needs pyarrow, which is only imported when a Parquet file is used.
+"""
+
+import csv
+import math
+import os
+
+import numpy as np
+
+from .lanes import Lanes
+from .numeric import as_numbers
+
+FORMATS = (".csv", ".npy", ".parquet")
+
+# Name of the supply column in Parquet files; the destinations are named by
+# their index.
+SUPPLY_COLUMN = "supply"
+
+
+def _format(path):
+    extension = os.path.splitext(path)[1].lower()
+    if extension not in FORMATS:
+        raise ValueError(f"Unsupported file type {extension!r}, expected one of {', '.join(FORMATS)}.")
+    return extension
+
+
+def _pyarrow():
+    try:
+        import pyarrow
+        import pyarrow.parquet
+    except ImportError:
+        raise ValueError("Reading and writing Parquet files needs the pyarrow package.") from None
+    return pyarrow
+
+
+def _read_parquet(path):
+    columns = _pyarrow().parquet.read_table(path).columns
+    return [column.to_numpy(zero_copy_only=False) for column in columns]
+
+
+def _amounts(values, path):
+    # Supplies and demands as a list of Python numbers, ints where possible.
+    # Blank and non-finite amounts are rejected.
+    values = values.tolist() if isinstance(values, np.ndarray) else list(values)
+    if any(value is None or isinstance(value, float) and not math.isfinite(value) for value in values):
+        raise ValueError(f"{path}: every supply and demand must be a finite number.")
+    if all(not isinstance(value, float) or value.is_integer() for value in values):
+        values = [int(value) for value in values]
+    return values
+
+
+def _cost_array(cost_matrix):
+    # Lists may use None for forbidden lanes, which become NaN.
+    if isinstance(cost_matrix, np.ndarray):
+        return cost_matrix
+    if any(value is None for row in cost_matrix for value in row):
+        return np.array([[np.nan if value is None else value for value in row] for row in cost_matrix])
+    return np.asarray(cost_matrix)
+
+
+def parse_number(text):
+    # A number as typed or stored in a CSV field: a Python int if it is an
+    # integer, however large, otherwise a float. Blank is None.
+    text = text.strip()
+    if not text:
+        return None
+    try:
+        return int(text)
+    except ValueError:
+        pass
+    try:
+        return float(text)
+    except ValueError:
+        raise ValueError(f"{text!r} is not a number.") from None
+
+
+def _parse(values):
+    # Numbers of one line as an array: float64 with blanks as NaN if any
+    # value is a float or blank, otherwise as numeric.as_numbers gives them.
+    if any(value is None or isinstance(value, float) for value in values):
+        return np.array([np.nan if value is None else value for value in values], dtype=np.float64)
+    return as_numbers(values)
+
+
+def _read_lines(path):
+    # The numbers of each non-empty CSV line, one line at a time.
+    with open(path, newline="") as f:
+        for fields in csv.reader(f):
+            if fields:
+                try:
+                    yield [parse_number(field) for field in fields]
+                except ValueError as e:
+                    raise ValueError(f"{path}: {e}") from None
+
+
+def _read_csv(path):
+    # The costs of every line but the last as an array with the line's last
+    # number, and the numbers of the last line (the demands) as a list.
+    rows = []
+    last = None
+    for values in _read_lines(path):
+        if last is not None:
+            rows.append((_parse(last[:-1]), last[-1]))
+        last = values
+    if not rows:
+        raise ValueError(f"{path} needs at least one cost row and a demand row.")
+    return rows, last
+
+
+def _write_csv(path, rows):
+    # rows is an iterable of sequences; NaN and None are written as blanks.
+    with open(path, "w", newline="") as f:
+        writer = csv.writer(f)
+        for row in rows:
+            row = row.tolist() if isinstance(row, np.ndarray) else row
+            writer.writerow(["" if value is None or value != value else value for value in row])
+
+
+def load_problem(path):
+    # Return (supply, demand, cost_matrix), with supply and demand as lists
+    # and the cost matrix as an array. For .npy files it is a view of the
+    # memory-mapped file.
+    extension = _format(path)
+    if extension == ".csv":
+        rows, demand = _read_csv(path)
+        m = len(rows[0][0])
+        if any(len(costs) != m for costs, _ in rows) or len(demand) not in (m, m + 1):
+            raise ValueError(f"{path}: every row must have the same number of columns.")
+        supply = _amounts([supply for _, supply in rows], path)
+        cost_matrix = np.vstack([costs for costs, _ in rows])
+        return supply, _amounts(demand[:m], path), cost_matrix
+
+    if extension == ".npy":
+        table = np.load(path, mmap_mode="r")
+        if table.ndim != 2 or min(table.shape) < 2:
+            raise ValueError(f"{path} must hold a table of at least 2 rows and 2 columns.")
+        return _amounts(table[:-1, -1], path), _amounts(table[-1, :-1], path), table[:-1, :-1]
+
+    # The supply column is stacked on its own, as its blank last cell would
+    # otherwise turn every cost into a float
+    columns = _read_parquet(path)
+    if len(columns) < 2 or len(columns[0]) < 2:
+        raise ValueError(f"{path} must hold a table of at least 2 rows and 2 columns.")
+    table = np.column_stack(columns[:-1])
+    return _amounts(columns[-1][:-1], path), _amounts(table[-1], path), table[:-1]
+
+
+def save_problem(path, supply, demand, cost_matrix):
+    extension = _format(path)
+    n, m = len(supply), len(demand)
+    if extension == ".csv":
+        rows = (list(row) + [supply[i]] for i, row in enumerate(cost_matrix))
+        _write_csv(path, [*rows, list(demand) + [None]])
+        return
+
+    cost = _cost_array(cost_matrix)
+    dtype = np.result_type(cost.dtype, np.asarray(supply).dtype, np.asarray(demand).dtype)
+    if extension == ".npy":
+        # Written straight into the file rather than assembled in memory
+        table = np.lib.format.open_memmap(path, mode="w+", dtype=dtype, shape=(n + 1, m + 1))
+        table[:n, :m] = cost
+        table[:n, m] = supply
+        table[n, :m] = demand
+        table[n, m] = np.nan if dtype.kind == "f" else 0
+        table.flush()
+        del table
+        return
+
+    pyarrow = _pyarrow()
+    columns = [pyarrow.array(np.append(cost[:, j], demand[j])) for j in range(m)]
+    columns.append(pyarrow.array(list(supply) + [None]))
+    pyarrow.parquet.write_table(pyarrow.table(columns, names=[str(j) for j in range(m)] + [SUPPLY_COLUMN]), path)
+
+
+def load_allocation(path):
+    extension = _format(path)
+    if extension == ".csv":
+        return np.vstack([_parse(values) for values in _read_lines(path)])
+    if extension == ".npy":
+        return np.load(path, mmap_mode="r")
+    return np.column_stack(_read_parquet(path))
+
+
+def save_allocation(path, allocation):
+    # allocation may be a list of lists, an array or Lanes. Lanes are
+    # written to CSV a row at a time and scattered into a memory-mapped .npy,
+    # so the whole matrix is never held in memory.
+    extension = _format(path)
+    sparse = isinstance(allocation, Lanes)
+    if extension == ".csv":
+        _write_csv(path, allocation.dense_rows() if sparse else allocation)
+    elif extension == ".npy" and sparse and allocation.values.dtype != object:
+        dense = np.lib.format.open_memmap(path, mode="w+", dtype=allocation.values.dtype, shape=allocation.shape)
+        dense[allocation.rows, allocation.cols] = allocation.values
+        dense.flush()
+        del dense
+    elif extension == ".npy":
+        np.save(path, allocation.to_dense() if sparse else np.asarray(allocation))
+    else:
+        pyarrow = _pyarrow()
+        allocation = allocation.to_dense() if sparse else np.asarray(allocation)
+        pyarrow.parquet.write_table(pyarrow.table([pyarrow.array(column) for column in allocation.T],
+                                                  names=[str(j) for j in range(allocation.shape[1])]), path)
@@ -0,0 +1,64 @@
+"""Reproducible random transportation problems for benchmarks and checks.
+
+The same arguments and seed always give the same problem. Sparse problems
+keep a random share of the lanes plus the cells of the NorthWest corner
+path, so they always have a feasible solution.
+"""
+
+import numpy as np
+
+from .lanes import Lanes
+
+
+def _northwest_path(supply, demand):
+    # Cells visited by the NorthWest corner method on the balanced problem,
+    # leaving out those in a dummy row or column.
+    supply = list(supply)
+    demand = list(demand)
+    n, m = len(supply), len(demand)
+    total_supply, total_demand = sum(supply), sum(demand)
+    if total_supply < total_demand:
+        supply.append(total_demand - total_supply)
+    elif total_supply > total_demand:
+        demand.append(total_supply - total_demand)
+
+    i = j = 0
+    cells = []
+    while i < len(supply) and j < len(demand):
+        if i < n and j < m:
+            cells.append((i, j))
+        allocated = min(supply[i], demand[j])
+        supply[i] -= allocated
+        demand[j] -= allocated
+        if supply[i] == 0:
+            i += 1
+        else:
+            j += 1
+    return cells
+
+
+def random_problem(rows, columns, seed=0, balanced=True, density=1.0, max_cost=100, max_amount=100):
+    # Return (supply, demand, cost_matrix) with integer costs in
+    # 1..max_cost. With density below 1 the cost matrix is Lanes holding
+    # about that share of the cells, otherwise a dense array.
+    rng = np.random.default_rng(seed)
+    supply = rng.integers(1, max_amount + 1, rows)
+    demand = rng.integers(1, max_amount + 1, columns)
+    difference = int(supply.sum() - demand.sum())
+    if balanced and difference > 0:
+        demand[rng.integers(columns)] += difference
+    elif balanced and difference < 0:
+        supply[rng.integers(rows)] -= difference
+    elif not balanced and difference == 0:
+        supply[rng.integers(rows)] += 1
+    supply, demand = supply.tolist(), demand.tolist()
+
+    cost = rng.integers(1, max_cost + 1, (rows, columns))
+    if density >= 1:
+        return supply, demand, cost
+
+    keep = rng.random((rows, columns)) < density
+    path = np.array(_northwest_path(supply, demand))
+    keep[path[:, 0], path[:, 1]] = True
+    lane_rows, lane_cols = np.nonzero(keep)
+    return supply, demand, Lanes(lane_rows, lane_cols, cost[lane_rows, lane_cols], (rows, columns))
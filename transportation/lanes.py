@@ -0,0 +1,86 @@
+"""Sparse matrices of lanes, in coordinate form.
+
+Lanes hold the costs of sparse problems for Network Simplex and the
+allocation every method returns, where only the cells that carry goods are
+kept. to_dense() and dense_rows() expand them into a full matrix.
+"""
+
+import numpy as np
+
+
+class Lanes:
+    # Sparse matrix in coordinate form over shape = (sources, destinations):
+    # entry k is values[k] at (rows[k], cols[k]). Used both for lane costs and
+    # for the amounts allocated to them.
+    def __init__(self, rows, cols, values, shape):
+        self.rows = np.asarray(rows, dtype=np.intp)
+        self.cols = np.asarray(cols, dtype=np.intp)
+        self.values = np.asarray(values)
+        self.shape = tuple(shape)
+        if not len(self.rows) == len(self.cols) == len(self.values):
+            raise ValueError("Lane rows, columns and values must have the same length.")
+        n, m = self.shape
+        if len(self.rows) and (self.rows.min() < 0 or self.rows.max() >= n
+                               or self.cols.min() < 0 or self.cols.max() >= m):
+            raise ValueError(f"Lane indices fall outside a {n}x{m} problem.")
+
+    def __len__(self):
+        return len(self.values)
+
+    def __repr__(self):
+        return f"Lanes(shape={self.shape}, lanes={len(self)})"
+
+    @classmethod
+    def from_dense(cls, matrix):
+        # Every cell is a lane except None and NaN, which mark forbidden lanes.
+        if isinstance(matrix, list) and any(value is None for row in matrix for value in row):
+            matrix = np.array(matrix, dtype=object)
+            rows, cols = np.nonzero(np.not_equal(matrix, None))
+            return cls(rows, cols, np.array(matrix[rows, cols].tolist()), matrix.shape)
+        matrix = np.asarray(matrix)
+        allowed = ~np.isnan(matrix) if matrix.dtype.kind == "f" else np.ones(matrix.shape, dtype=bool)
+        rows, cols = np.nonzero(allowed)
+        return cls(rows, cols, matrix[rows, cols], matrix.shape)
+
+    @classmethod
+    def nonzero(cls, matrix):
+        # The nonzero cells of a dense matrix, such as an allocation.
+        matrix = np.asarray(matrix)
+        rows, cols = np.nonzero(matrix)
+        return cls(rows, cols, matrix[rows, cols], matrix.shape)
+
+    def crop(self, shape):
+        # The lanes within the first shape[0] rows and shape[1] columns, such
+        # as an allocation without its dummy row or column.
+        n, m = shape
+        keep = (self.rows < n) & (self.cols < m)
+        return Lanes(self.rows[keep], self.cols[keep], self.values[keep], shape)
+
+    def to_dense(self, fill=0):
+        dense = np.full(self.shape, fill, dtype=np.result_type(self.values.dtype, type(fill)))
+        dense[self.rows, self.cols] = self.values
+        return dense
+
+    def dense_rows(self, fill=0):
+        # to_dense() one row at a time, so only a row is ever expanded.
+        order = np.argsort(self.rows, kind="stable")
+        ends = np.searchsorted(self.rows[order], np.arange(1, self.shape[0] + 1))
+        dtype = np.result_type(self.values.dtype, type(fill))
+        start = 0
+        for end in ends:
+            row = np.full(self.shape[1], fill, dtype=dtype)
+            lanes = order[start:end]
+            row[self.cols[lanes]] = self.values[lanes]
+            start = end
+            yield row
+
+
+def as_lanes(cost_matrix):
+    # Return cost_matrix as Lanes if it is sparse (Lanes or anything with a
+    # SciPy-style tocoo()), otherwise None.
+    if isinstance(cost_matrix, Lanes):
+        return cost_matrix
+    if hasattr(cost_matrix, "tocoo"):
+        coo = cost_matrix.tocoo()
+        return Lanes(coo.row, coo.col, coo.data, coo.shape)
+    return None
@@ -0,0 +1,225 @@
+"""Network simplex backend for large and sparse transportation problems.
+
+Costs are given per lane in coordinate form and lanes that aren't listed are
+forbidden outright, rather than being priced with a large sentinel cost. The
+problem is solved as a min-cost flow from sources to destinations. The start
+is an all-artificial spanning tree hanging from an extra root node, and
+entering arcs are priced in blocks of about sqrt(arcs) lanes at a time. As in
+the MODI optimizer, the basis tree keeps parent and depth indices and each
+pivot only re-hangs the subtree cut off by the leaving arc.
+"""
+
+import math
+
+import numpy as np
+
+from .lanes import Lanes, as_lanes
+from .numeric import as_numbers, shortfall, tolerance
+
+# Smallest number of arcs priced together in one block.
+MIN_BLOCK = 64
+
+
+def balance_lanes(supply, demand, lanes):
+    # Sparse counterpart of solver.balance_problem: a dummy source or
+    # destination is joined to every line on the other side at zero cost.
+    supply = np.asarray(supply)
+    demand = np.asarray(demand)
+    n, m = lanes.shape
+    difference = shortfall(supply, demand)
+
+    if difference > 0:
+        supply = np.append(supply, difference)
+        lanes = Lanes(np.append(lanes.rows, np.full(m, n)), np.append(lanes.cols, np.arange(m)),
+                      np.append(lanes.values, np.zeros(m, dtype=lanes.values.dtype)), (n + 1, m))
+    elif difference < 0:
+        demand = np.append(demand, -difference)
+        lanes = Lanes(np.append(lanes.rows, np.arange(n)), np.append(lanes.cols, np.full(n, m)),
+                      np.append(lanes.values, np.zeros(n, dtype=lanes.values.dtype)), (n, m + 1))
+    return supply, demand, lanes
+
+
+class _Tree:
+    # Spanning tree over the sources, destinations and the artificial root,
+    # with arc ids stored on both ends of each tree edge.
+    def __init__(self, nodes, root, arcs):
+        self.adj = [{} for _ in range(nodes)]
+        self.parent = [root] * nodes
+        self.pred = list(arcs) + [-1]
+        self.depth = [1] * nodes
+        self.parent[root] = -1
+        self.depth[root] = 0
+        for node, arc in enumerate(arcs):
+            self.adj[node][root] = arc
+            self.adj[root][node] = arc
+
+    def climb(self, a, b):
+        # Nodes whose tree edge lies on the path up from a, and up from b, to
+        # their common ancestor.
+        parent, depth = self.parent, self.depth
+        up_a, up_b = [], []
+        while depth[a] > depth[b]:
+            up_a.append(a)
+            a = parent[a]
+        while depth[b] > depth[a]:
+            up_b.append(b)
+            b = parent[b]
+        while a != b:
+            up_a.append(a)
+            a = parent[a]
+            up_b.append(b)
+            b = parent[b]
+        return up_a, up_b
+
+    def contains(self, top, node):
+        parent, depth = self.parent, self.depth
+        while depth[node] > depth[top]:
+            node = parent[node]
+        return node == top
+
+    def replace(self, leaving, a, b, arc):
+        # Drop the edge above node leaving and add arc between a and b, where a
+        # is on the side that was cut off. Returns the nodes of that side.
+        above = self.parent[leaving]
+        del self.adj[leaving][above]
+        del self.adj[above][leaving]
+        self.adj[a][b] = arc
+        self.adj[b][a] = arc
+
+        parent, pred, depth, adj = self.parent, self.pred, self.depth, self.adj
+        parent[a] = b
+        pred[a] = arc
+        depth[a] = depth[b] + 1
+        nodes = [a]
+        for node in nodes:
+            below = depth[node] + 1
+            for other, edge in adj[node].items():
+                if other != parent[node]:
+                    parent[other] = node
+                    pred[other] = edge
+                    depth[other] = below
+                    nodes.append(other)
+        return nodes
+
+
+def network_simplex(supply, demand, lanes, on_pivot=None, trace=None):
+    # Solve a balanced problem over the given lanes. Returns the amount
+    # carried by each lane, the total cost and the number of pivots, and
+    # raises ValueError if the demand can't be met over the allowed lanes.
+    # on_pivot, if given, is called with the pivot count after every pivot;
+    # trace, a trace.Trace, times the pricing and the pivots.
+    supply = as_numbers(supply, len(supply))
+    demand = as_numbers(demand, len(demand))
+    n, m = lanes.shape
+    lane_count = len(lanes)
+    root = n + m
+
+    order = lanes.rows * m + lanes.cols
+    if len(np.unique(order)) != lane_count:
+        raise ValueError("Each lane may only be listed once.")
+
+    # Artificial arcs join every node to the root: sources with supply send
+    # it up to the root, everything else hangs below it. Their cost is higher
+    # than any path through real lanes, so they only carry flow at the end
+    # when the problem is infeasible.
+    has_supply = supply > 0
+    tail = np.concatenate([lanes.rows, np.where(has_supply, np.arange(n), root), np.full(m, root)])
+    head = np.concatenate([lanes.cols + n, np.where(has_supply, root, np.arange(n)), np.arange(n, n + m)])
+    # Potentials and reduced costs stay within a few times big, which is
+    # itself n + m times the largest cost.
+    values = as_numbers(lanes.values, 4 * (n + m + 1))
+    dtype = values.dtype
+    largest = np.abs(values).max() if lane_count else 0
+    big = (n + m) * (largest + 1)
+    cost = np.concatenate([values, np.full(n + m, big, dtype=dtype)])
+    flow = np.zeros(len(cost), dtype=np.result_type(supply.dtype, demand.dtype))
+    flow[lane_count:] = np.concatenate([supply, demand])
+
+    pot = np.zeros(n + m + 1, dtype=dtype)
+    pot[:root] = -big
+    pot[:n][has_supply] = big
+    tree = _Tree(n + m + 1, root, range(lane_count, lane_count + n + m))
+    tol = tolerance(cost)
+
+    arcs = len(cost)
+    block = max(MIN_BLOCK, int(math.sqrt(arcs)))
+    blocks = -(-arcs // block)
+    start = 0
+    pivots = 0
+
+    while True:
+        if trace is not None:
+            started = trace.clock()
+        # Block search pricing, resuming at the block of the last pivot.
+        entering = -1
+        for k in range(blocks):
+            lo = (start + k) % blocks * block
+            hi = min(lo + block, arcs)
+            reduced = cost[lo:hi] - pot[tail[lo:hi]] + pot[head[lo:hi]]
+            best = int(np.argmin(reduced))
+            if trace is not None:
+                trace.count("scans", hi - lo)
+            if reduced[best] < -tol:
+                entering = lo + best
+                delta = reduced[best]
+                start = (start + k) % blocks
+                break
+        if trace is not None:
+            trace.span("pricing", started)
+            started = trace.clock()
+        if entering < 0:
+            break
+
+        # Flow goes round the cycle tail -> head -> ... -> tail. Arcs met
+        # against their direction lose flow and may block.
+        t, h = int(tail[entering]), int(head[entering])
+        up_t, up_h = tree.climb(t, h)
+        pred = tree.pred
+        blocking_t = [x for x in up_t if head[pred[x]] != x]
+        blocking_h = [x for x in up_h if tail[pred[x]] != x]
+        theta = min(flow[pred[x]] for x in blocking_t + blocking_h)
+
+        # Strongly feasible rule: the last blocking arc met when walking the
+        # cycle from the common ancestor down to tail and back up from head.
+        leaving = next((x for x in reversed(blocking_h) if flow[pred[x]] == theta), None)
+        if leaving is None:
+            leaving = next(x for x in blocking_t if flow[pred[x]] == theta)
+
+        if theta:
+            for x in up_t:
+                flow[pred[x]] += theta if head[pred[x]] == x else -theta
+            for x in up_h:
+                flow[pred[x]] += theta if tail[pred[x]] == x else -theta
+            flow[entering] += theta
+
+        # Re-hang the side that was cut off and shift its potentials so the
+        # entering arc's reduced cost becomes zero.
+        if tree.contains(leaving, t):
+            nodes = tree.replace(leaving, t, h, entering)
+            pot[nodes] += delta
+        else:
+            nodes = tree.replace(leaving, h, t, entering)
+            pot[nodes] -= delta
+        pivots += 1
+        if trace is not None:
+            trace.span("pivot", started)
+            trace.count("pivots")
+        if on_pivot is not None:
+            on_pivot(pivots)
+
+    if (flow[lane_count:] > tolerance(np.concatenate([supply, demand]))).any():
+        raise ValueError("No feasible allocation: some demand can't be reached from the available supply.")
+
+    used = np.flatnonzero(flow[:lane_count])
+    total_cost = sum(f * c for f, c in zip(flow[used].tolist(), cost[used].tolist()))
+    return flow[:lane_count], total_cost, pivots
+
+
+def solve_lanes(supply, demand, lanes, on_pivot=None, trace=None):
+    # Balance a sparse problem and solve it. Returns the allocation as Lanes
+    # holding only the lanes that carry something, the total cost and the
+    # number of pivots.
+    supply, demand, lanes = balance_lanes(supply, demand, lanes)
+    flow, total_cost, pivots = network_simplex(supply, demand, lanes, on_pivot, trace)
+    used = np.flatnonzero(flow)
+    return Lanes(lanes.rows[used], lanes.cols[used], flow[used], lanes.shape), total_cost, pivots
@@ -0,0 +1,65 @@
+"""Number types used by the array-based solving methods.
+
+Integer problems run on int64 arrays when every value, and every sum or
+potential the methods build from them, is sure to fit. Larger integers fall
+back to arrays of Python ints, which are exact but slower. Float problems run
+on float64 and compare against a tolerance scaled to the size of the values
+instead of against zero.
+"""
+
+import numpy as np
+
+# int64 is used while values times their headroom stay below this.
+INT64_LIMIT = 2 ** 62
+
+# Float comparisons allow this much error relative to the largest value.
+FLOAT_TOLERANCE = 1e-9
+
+
+def as_numbers(values, headroom=1):
+    # values as an int64, float64 or Python int (object) array. headroom is
+    # how many times the largest value must still fit in int64, e.g. the
+    # number of terms in the longest sum formed from them.
+    array = np.asarray(values)
+    kind = array.dtype.kind
+    if kind == "O":
+        items = array.ravel().tolist()
+        if any(isinstance(item, float) for item in items):
+            return array.astype(np.float64)
+        if not all(isinstance(item, (int, np.integer)) for item in items):
+            raise ValueError("Costs and amounts must be numbers.")
+        largest = max((abs(int(item)) for item in items), default=0)
+    elif kind == "f":
+        return array.astype(np.float64, copy=False)
+    elif kind in "biu":
+        largest = max(int(array.max()), -int(array.min())) if array.size else 0
+    else:
+        raise ValueError(f"Costs and amounts must be numbers, not {array.dtype}.")
+
+    if largest * headroom < INT64_LIMIT:
+        return array.astype(np.int64, copy=False)
+    return np.array([int(item) for item in array.ravel().tolist()], dtype=object).reshape(array.shape)
+
+
+def tolerance(array):
+    # Smallest difference that counts as nonzero.
+    if array.dtype.kind != "f" or not array.size:
+        return 0
+    return FLOAT_TOLERANCE * max(1.0, float(np.abs(array).max()))
+
+
+def shortfall(supply, demand):
+    # Total demand minus total supply, or zero if float rounding is all that
+    # separates them, so that no dummy line is added for it.
+    difference = sum(demand) - sum(supply)
+    if isinstance(difference, (float, np.floating)):
+        largest = max(1.0, max(map(abs, supply), default=0), max(map(abs, demand), default=0))
+        if abs(difference) <= FLOAT_TOLERANCE * largest:
+            return 0
+    return difference
+
+
+def total_cost(rows, cols, amounts, cost):
+    # Cost of allocating amounts[k] to each cell (rows[k], cols[k]), summed
+    # exactly as Python numbers.
+    return sum(a * c for a, c in zip(np.asarray(amounts).tolist(), cost[rows, cols].tolist()))
@@ -0,0 +1,248 @@
+"""MODI (u-v method) optimization of an initial basic feasible solution.
+
+The basic cells form a spanning tree over the row and column nodes. The tree
+is kept rooted at row 0 with parent and depth indices, so the stepping-stone
+cycle for an entering cell is found by climbing from its row and column to
+their common ancestor instead of searching the matrix for a closed loop.
+After each pivot only the subtree cut off by the leaving cell is re-rooted
+and has its potentials shifted.
+
+Degenerate solutions are completed to a full basis with zero cells, and ties
+for the leaving cell follow the strongly feasible tree rule to avoid cycling.
+"""
+
+import numpy as np
+
+from .lanes import Lanes
+from .numeric import as_numbers, tolerance
+from .trace import phase
+
+# Reduced costs are priced this many cells at a time; the first block holding
+# an improving cell supplies the entering cell.
+BLOCK_CELLS = 1 << 12
+
+
+def _amounts(allocation):
+    # The allocated cells of a dense or Lanes allocation as {(i, j): amount}.
+    if not isinstance(allocation, Lanes):
+        allocation = Lanes.nonzero(allocation)
+    cells = zip(allocation.rows.tolist(), allocation.cols.tolist(), allocation.values.tolist())
+    return {(i, j): amount for i, j, amount in cells if amount}
+
+
+def _spanning_basis(shape, flow, basis):
+    # Return n + m - 1 cells forming a spanning tree that includes every
+    # cell of flow, adding zero cells for degenerate solutions.
+    n, m = shape
+    roots = list(range(n + m))
+
+    def find(x):
+        while roots[x] != x:
+            roots[x] = roots[roots[x]]
+            x = roots[x]
+        return x
+
+    def join(i, j):
+        a, b = find(i), find(n + j)
+        if a == b:
+            return False
+        roots[a] = b
+        return True
+
+    if basis is None:
+        basis = flow
+    cells = []
+    for i, j in basis:
+        i, j = int(i), int(j)
+        if join(i, j):
+            cells.append((i, j))
+        elif (i, j) in flow:
+            raise ValueError("The allocation contains a cycle and is not a basic solution.")
+    if sum(1 for cell in cells if cell in flow) != len(flow):
+        raise ValueError("The allocation has nonzero cells outside the given basis.")
+
+    # Connect what's left row by row, then column by column. Row 0 is joined
+    # to column 0 too, or they could stay in separate trees.
+    for i in range(n):
+        if join(i, 0):
+            cells.append((i, 0))
+    for j in range(1, m):
+        if join(0, j):
+            cells.append((0, j))
+    return cells
+
+
+class _Tree:
+    # Basis tree over nodes 0..n-1 (rows) and n..n+m-1 (columns), rooted at
+    # row 0, with the u and v potentials stored together in pot.
+    def __init__(self, cost, cells):
+        n, m = cost.shape
+        self.n = n
+        self.cost = cost
+        self.adj = [set() for _ in range(n + m)]
+        for i, j in cells:
+            self.adj[i].add(n + j)
+            self.adj[n + j].add(i)
+        self.parent = [-1] * (n + m)
+        self.depth = [0] * (n + m)
+        self.pot = np.zeros(n + m, dtype=cost.dtype)
+        for node in self._hang(0, -1)[1:]:
+            above = self.parent[node]
+            self.pot[node] = cost[self.cell(node, above)] - self.pot[above]
+
+    def cell(self, a, b):
+        return (a, b - self.n) if a < self.n else (b, a - self.n)
+
+    def _hang(self, top, above):
+        # Re-root the part of the tree reachable from top without passing
+        # through above, hanging it below above. Returns the nodes visited
+        # in breadth-first order.
+        parent, depth, adj = self.parent, self.depth, self.adj
+        parent[top] = above
+        depth[top] = depth[above] + 1 if above >= 0 else 0
+        nodes = [top]
+        for node in nodes:
+            below = depth[node] + 1
+            for other in adj[node]:
+                if other != parent[node]:
+                    parent[other] = node
+                    depth[other] = below
+                    nodes.append(other)
+        return nodes
+
+    def cycle(self, i, j):
+        # Child nodes of the tree edges between row i and column j, as the
+        # path up from i and the path up from j to their common ancestor.
+        parent, depth = self.parent, self.depth
+        a, b = i, self.n + j
+        up_a, up_b = [], []
+        while depth[a] > depth[b]:
+            up_a.append(a)
+            a = parent[a]
+        while depth[b] > depth[a]:
+            up_b.append(b)
+            b = parent[b]
+        while a != b:
+            up_a.append(a)
+            a = parent[a]
+            up_b.append(b)
+            b = parent[b]
+        return up_a, up_b
+
+    def pivot(self, i, j, leaving, reduced):
+        # Swap the tree edge above node leaving for the cell (i, j), whose
+        # reduced cost is given.
+        n = self.n
+        above = self.parent[leaving]
+        self.adj[leaving].discard(above)
+        self.adj[above].discard(leaving)
+        self.adj[i].add(n + j)
+        self.adj[n + j].add(i)
+
+        # Whichever end of the entering cell was cut off gets re-hung below
+        # the other end, and the potentials of that subtree shift so that
+        # the entering cell's reduced cost becomes zero.
+        if self._in_subtree(i, leaving):
+            nodes = np.array(self._hang(i, n + j))
+            shift = reduced
+        else:
+            nodes = np.array(self._hang(n + j, i))
+            shift = -reduced
+        rows = nodes < n
+        self.pot[nodes[rows]] += shift
+        self.pot[nodes[~rows]] -= shift
+
+    def _in_subtree(self, node, top):
+        parent, depth = self.parent, self.depth
+        while depth[node] > depth[top]:
+            node = parent[node]
+        return node == top
+
+
+def modi(cost_matrix, allocation, basis=None, on_pivot=None, trace=None):
+    # Improve a basic feasible allocation of a balanced problem, dense or as
+    # Lanes, until no cell has a negative reduced cost. Returns the optimal
+    # allocation as Lanes, its cost, the number of pivots and the final basis
+    # cells. on_pivot, if given, is called with the pivot count after every
+    # pivot; trace, a trace.Trace, times the pricing and the pivots.
+    cost = np.asarray(cost_matrix)
+    n, m = cost.shape
+    # Potentials are sums of up to n + m costs, reduced costs of three
+    # potentials or costs.
+    cost = as_numbers(cost, 3 * (n + m))
+    # Only basic cells carry anything, so amounts are kept per cell.
+    flow = _amounts(allocation)
+
+    with phase(trace, "basis"):
+        cells = _spanning_basis((n, m), flow, basis)
+        tree = _Tree(cost, cells)
+    tol = tolerance(cost)
+
+    block = max(1, BLOCK_CELLS // m)
+    blocks = -(-n // block)
+    start = 0
+    pivots = 0
+
+    while True:
+        if trace is not None:
+            started = trace.clock()
+        # Price blocks of rows cyclically, starting at the last pivot's block.
+        entering = None
+        for k in range(blocks):
+            top = (start + k) % blocks * block
+            end = min(top + block, n)
+            reduced = cost[top:end] - tree.pot[top:end, None] - tree.pot[None, n:]
+            flat = int(np.argmin(reduced))
+            if trace is not None:
+                trace.count("scans", reduced.size)
+            if reduced.flat[flat] < -tol:
+                r, j = divmod(flat, m)
+                entering = (top + r, j, reduced.flat[flat])
+                start = (start + k) % blocks
+                break
+        if trace is not None:
+            trace.span("pricing", started)
+            started = trace.clock()
+        if entering is None:
+            break
+
+        i, j, delta = entering
+        up_i, up_j = tree.cycle(i, j)
+        # Both paths start with a cell that loses flow and then alternate.
+        losing_i = [tree.cell(x, tree.parent[x]) for x in up_i[::2]]
+        losing_j = [tree.cell(x, tree.parent[x]) for x in up_j[::2]]
+        theta = min(flow.get(c, 0) for c in losing_i + losing_j)
+
+        # Strongly feasible rule: walking the cycle from the common ancestor
+        # down to i and back up from j, the last blocking cell leaves.
+        leaving = None
+        for x in reversed(up_j[::2]):
+            if flow.get(tree.cell(x, tree.parent[x]), 0) == theta:
+                leaving = x
+                break
+        if leaving is None:
+            for x in up_i[::2]:
+                if flow.get(tree.cell(x, tree.parent[x]), 0) == theta:
+                    leaving = x
+                    break
+
+        for path in (up_i, up_j):
+            for k, x in enumerate(path):
+                c = tree.cell(x, tree.parent[x])
+                flow[c] = flow.get(c, 0) + (-theta if k % 2 == 0 else theta)
+        flow[i, j] = flow.get((i, j), 0) + theta
+        flow.pop(tree.cell(leaving, tree.parent[leaving]), None)
+
+        tree.pivot(i, j, leaving, delta)
+        pivots += 1
+        if trace is not None:
+            trace.span("pivot", started)
+            trace.count("pivots")
+        if on_pivot is not None:
+            on_pivot(pivots)
+
+    basis = [tree.cell(x, tree.parent[x]) for x in range(n + m) if tree.parent[x] >= 0]
+    used = [c for c in basis if flow.get(c)]
+    allocation = Lanes([i for i, _ in used], [j for _, j in used], np.array([flow[c] for c in used]), (n, m))
+    total_cost = sum(flow[c] * cost.item(c) for c in used)
+    return allocation, total_cost, pivots, basis
@@ -0,0 +1,257 @@
+"""Headless solvers for the transportation problem.
+
+Nothing in this module touches tkinter, so problems can be solved from
+scripts and batch jobs as well as from the GUI in ``main.py``.
+"""
+
+import math
+
+import numpy as np
+
+from .lanes import Lanes, as_lanes
+from .least_cost import least_cost
+from .network_simplex import solve_lanes
+from .numeric import shortfall
+from .optimize import modi
+from .trace import phase
+from .vogel import vogel
+
+NORTHWEST = "NorthWest Method"
+LEAST_COST = "Least Cost Method"
+VOGEL = "Vogel's Approximation Method"
+NETWORK_SIMPLEX = "Network Simplex"
+
+
+class Cancelled(Exception):
+    # Raised from a progress callback to abandon a solve part way through.
+    pass
+
+
+class Solution:
+    # allocation is Lanes holding the allocated cells; allocation.to_dense()
+    # gives the full matrix. iterations counts the steps of the method itself
+    # and pivots the MODI steps taken after it. initial_cost is the cost
+    # before optimizing and basis the final basis cells, when MODI was run.
+    # optimized is True for any solution known to be optimal. warm_start is
+    # True when MODI started from a repaired earlier solution rather than
+    # from the method's own.
+    def __init__(self, method, allocation, total_cost, iterations,
+                 initial_cost=None, pivots=0, basis=None, optimized=None, warm_start=False):
+        self.method = method
+        self.allocation = allocation
+        self.total_cost = total_cost
+        self.iterations = iterations
+        self.initial_cost = total_cost if initial_cost is None else initial_cost
+        self.pivots = pivots
+        self.basis = basis
+        self.optimized = basis is not None if optimized is None else optimized
+        self.warm_start = warm_start
+
+    def __repr__(self):
+        return (f"Solution(method={self.method!r}, total_cost={self.total_cost}, "
+                f"iterations={self.iterations}, pivots={self.pivots})")
+
+
+class Workspace:
+    # Scratch supply and demand lists reused from one solve to the next. The
+    # cost matrix isn't copied: its rows are shared with the caller's and
+    # only a problem that needs a dummy column gets new rows.
+    def __init__(self):
+        self.supply = []
+        self.demand = []
+
+    def load(self, supply, demand, cost_matrix):
+        check_problem(supply, demand, cost_matrix)
+        self.supply[:] = supply
+        self.demand[:] = demand
+        if isinstance(cost_matrix, np.ndarray):
+            # Arrays, memory-mapped ones included, are padded instead
+            return self.supply, self.demand, _balance_array(self.supply, self.demand, cost_matrix)
+
+        rows = list(cost_matrix)
+        difference = shortfall(self.supply, self.demand)
+        if difference > 0:
+            self.supply.append(difference)
+            rows.append([0] * len(self.demand))
+        elif difference < 0:
+            self.demand.append(-difference)
+            rows = [[*row, 0] for row in rows]
+        return self.supply, self.demand, rows
+
+
+def check_problem(supply, demand, cost_matrix):
+    if len(supply) == 0 or len(demand) == 0:
+        raise ValueError("Supply and demand must not be empty.")
+    if hasattr(cost_matrix, "shape"):
+        rows, columns = cost_matrix.shape
+        widths = {columns}
+    else:
+        rows = len(cost_matrix)
+        widths = {len(row) for row in cost_matrix}
+    if rows != len(supply):
+        raise ValueError(f"Cost matrix has {rows} rows but there are {len(supply)} supplies.")
+    if widths - {len(demand)}:
+        raise ValueError(f"Cost matrix rows must have {len(demand)} columns, one per demand.")
+    if not all(_finite(value) for value in supply) or not all(_finite(value) for value in demand):
+        raise ValueError("Supply and demand must be finite numbers.")
+    if any(value < 0 for value in supply) or any(value < 0 for value in demand):
+        raise ValueError("Supply and demand must be non-negative.")
+
+
+def _finite(value):
+    # Also true for integers too large to convert to float.
+    return value is not None and value == value and abs(value) != math.inf
+
+
+def has_blanks(cost_matrix):
+    # True if any cost is None or NaN, i.e. marks a forbidden lane.
+    if isinstance(cost_matrix, np.ndarray) and cost_matrix.dtype != object:
+        return cost_matrix.dtype.kind == "f" and bool(np.isnan(cost_matrix).any())
+    return any(value is None or value != value for row in cost_matrix for value in row)
+
+
+def balance_problem(supply, demand, cost_matrix):
+    # Add a dummy source or destination with zero costs so that total
+    # supply equals total demand. The arguments are modified in place.
+    difference = shortfall(supply, demand)
+    if difference > 0:
+        supply.append(difference)
+        cost_matrix.append([0] * len(cost_matrix[0]))
+    elif difference < 0:
+        for row in cost_matrix:
+            row.append(0)
+        demand.append(-difference)
+
+
+def _balance_array(supply, demand, cost_matrix):
+    # Like balance_problem, but the cost matrix is an array that is returned
+    # padded with a zero row or column instead of being modified.
+    difference = shortfall(supply, demand)
+    if difference > 0:
+        supply.append(difference)
+        return np.pad(cost_matrix, ((0, 1), (0, 0)))
+    if difference < 0:
+        demand.append(-difference)
+        return np.pad(cost_matrix, ((0, 0), (0, 1)))
+    return cost_matrix
+
+
+# The _method functions below solve an already balanced problem, consuming
+# supply and demand in place. on_step, if given, is called after every
+# allocation as on_step(i, j, amount, supply, demand) with the values as
+# they stand at that point. Methods that pivot instead call on_pivot(pivots)
+# after every pivot. trace, a trace.Trace, records their phases and counts.
+# The allocation is returned as Lanes.
+
+def _northwest(supply, demand, cost_matrix, on_step=None, on_pivot=None, trace=None):
+    i = j = 0
+    rows, cols, amounts = [], [], []
+    total_cost = 0
+    iterations = 0
+
+    with phase(trace, "allocate"):
+        while i < len(supply) and j < len(demand):
+            allocated = min(supply[i], demand[j])
+            rows.append(i)
+            cols.append(j)
+            amounts.append(allocated)
+            supply[i] -= allocated
+            demand[j] -= allocated
+            cost = cost_matrix[i][j]
+            total_cost += allocated * (cost.item() if isinstance(cost, np.generic) else cost)
+            iterations += 1
+            if trace is not None:
+                trace.count("scans")
+                trace.count("allocations")
+            if on_step is not None:
+                on_step(i, j, allocated, supply, demand)
+            if supply[i] == 0:
+                i += 1
+            else:
+                j += 1
+
+    return Lanes(rows, cols, amounts, (len(supply), len(demand))), total_cost, iterations
+
+
+def _least_cost(supply, demand, cost_matrix, on_step=None, on_pivot=None, trace=None):
+    return least_cost(np.array(supply), np.array(demand), cost_matrix, on_step, trace=trace)
+
+
+def _vogel(supply, demand, cost_matrix, on_step=None, on_pivot=None, trace=None):
+    return vogel(np.array(supply), np.array(demand), cost_matrix, on_step, trace)
+
+
+def _network_simplex(supply, demand, cost_matrix, on_step=None, on_pivot=None, trace=None):
+    # Dense entry point: None or NaN costs mark forbidden lanes. The result
+    # is already optimal, so the pivots are reported as iterations.
+    return solve_lanes(supply, demand, Lanes.from_dense(cost_matrix), on_pivot, trace)
+
+
+METHODS = {
+    NORTHWEST: _northwest,
+    LEAST_COST: _least_cost,
+    VOGEL: _vogel,
+    NETWORK_SIMPLEX: _network_simplex,
+}
+
+
+def solve(supply, demand, cost_matrix, method=VOGEL, on_step=None, workspace=None, optimize=False,
+          on_pivot=None, trace=None):
+    # Balance a copy of the problem and solve it with the named method. With
+    # optimize=True the method's solution only seeds MODI, which takes it to
+    # an optimal one. The caller's lists are never modified. trace, a
+    # trace.Trace, records where the time went.
+    #
+    # cost_matrix may also be sparse (Lanes or a SciPy sparse matrix), in
+    # which case only the listed lanes may be used and the method must be
+    # NETWORK_SIMPLEX.
+    if method not in METHODS:
+        raise ValueError(f"Unknown method: {method!r}")
+    with phase(trace, "solve", method=method):
+        return _solve(supply, demand, cost_matrix, method, on_step, workspace, optimize, on_pivot, trace)
+
+
+def _solve(supply, demand, cost_matrix, method, on_step, workspace, optimize, on_pivot, trace):
+    lanes = as_lanes(cost_matrix)
+    if lanes is not None:
+        if method != NETWORK_SIMPLEX:
+            raise ValueError(f"Sparse cost matrices can only be solved with the {NETWORK_SIMPLEX} method.")
+        check_problem(supply, demand, lanes)
+        allocation, total_cost, pivots = solve_lanes(supply, demand, lanes, on_pivot, trace)
+        return Solution(method, allocation, total_cost, pivots, optimized=True)
+    if method != NETWORK_SIMPLEX and has_blanks(cost_matrix):
+        raise ValueError(f"Blank costs are only allowed with the {NETWORK_SIMPLEX} method.")
+    if workspace is None:
+        workspace = Workspace()
+    with phase(trace, "balance"):
+        supply, demand, cost_matrix = workspace.load(supply, demand, cost_matrix)
+    with phase(trace, method):
+        allocation, total_cost, iterations = METHODS[method](supply, demand, cost_matrix, on_step, on_pivot, trace)
+    if method == NETWORK_SIMPLEX:
+        return Solution(method, allocation, total_cost, iterations, optimized=True)
+    if not optimize:
+        return Solution(method, allocation, total_cost, iterations)
+
+    initial_cost = total_cost
+    with phase(trace, "MODI"):
+        allocation, total_cost, pivots, basis = modi(cost_matrix, allocation, on_pivot=on_pivot, trace=trace)
+    return Solution(method, allocation, total_cost, iterations, initial_cost, pivots, basis)
+
+
+def solve_many(problems, method=VOGEL, optimize=False, trace=None):
+    # Solve an iterable of (supply, demand, cost_matrix) problems. Returns a
+    # list of Solutions in order.
+    return [solve(supply, demand, cost_matrix, method, optimize=optimize, trace=trace)
+            for supply, demand, cost_matrix in problems]
+
+
+def northwest_method(supply, demand, cost_matrix, on_step=None):
+    return solve(supply, demand, cost_matrix, NORTHWEST, on_step)
+
+
+def least_cost_method(supply, demand, cost_matrix, on_step=None):
+    return solve(supply, demand, cost_matrix, LEAST_COST, on_step)
+
+
+def vogel_approximation_method(supply, demand, cost_matrix, on_step=None):
+    return solve(supply, demand, cost_matrix, VOGEL, on_step)
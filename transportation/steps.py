@@ -0,0 +1,111 @@
+"""Compact recording of the allocation steps taken by a solving method.
+
+Each step is stored as a delta: the cell that was allocated, the amount, and
+the supply and demand left in its row and column afterwards. A full picture
+of the matrices at any step can be rebuilt by replaying the deltas, so
+nothing proportional to the problem size is kept per step.
+
+Steps go into a fixed-size buffer. When it fills up they are either spilled
+to a temporary file, so every step stays available, or the oldest ones are
+overwritten as in a ring buffer.
+"""
+
+import tempfile
+from collections import namedtuple
+
+import numpy as np
+
+Step = namedtuple("Step", "row col amount supply demand")
+
+
+def step_dtype(value_dtype=np.int64):
+    return np.dtype([("row", np.int64), ("col", np.int64), ("amount", value_dtype),
+                     ("supply", value_dtype), ("demand", value_dtype)])
+
+
+class StepRecorder:
+    # Can be passed directly as the on_step callback of solver.solve.
+    def __init__(self, capacity=4096, spill=True, value_dtype=np.int64):
+        self.capacity = capacity
+        self.spill = spill
+        self.dtype = step_dtype(value_dtype)
+        self._buffer = np.empty(capacity, dtype=self.dtype)
+        self._count = 0
+        self._spilled = 0
+        self._file = None
+
+    def __call__(self, i, j, amount, supply, demand):
+        if self.spill:
+            if self._count - self._spilled == self.capacity:
+                self._flush()
+            slot = self._count - self._spilled
+        else:
+            slot = self._count % self.capacity
+        self._buffer[slot] = (i, j, amount, supply[i], demand[j])
+        self._count += 1
+
+    def _flush(self):
+        if self._file is None:
+            self._file = tempfile.TemporaryFile()
+        self._file.seek(0, 2)
+        self._file.write(self._buffer.tobytes())
+        self._spilled += self.capacity
+
+    def __len__(self):
+        return self._count
+
+    @property
+    def first(self):
+        # Index of the oldest step still available.
+        return 0 if self.spill else max(0, self._count - self.capacity)
+
+    def records(self, start=None, stop=None):
+        # Steps start..stop-1 as a structured array.
+        start = self.first if start is None else max(start, self.first)
+        stop = self._count if stop is None else min(stop, self._count)
+        if start >= stop:
+            return np.empty(0, dtype=self.dtype)
+        if not self.spill:
+            return self._buffer[np.arange(start, stop) % self.capacity]
+
+        parts = []
+        if start < self._spilled:
+            end = min(stop, self._spilled)
+            self._file.seek(start * self.dtype.itemsize)
+            parts.append(np.frombuffer(self._file.read((end - start) * self.dtype.itemsize), dtype=self.dtype))
+        if stop > self._spilled:
+            parts.append(self._buffer[max(start, self._spilled) - self._spilled:stop - self._spilled])
+        return np.concatenate(parts) if len(parts) > 1 else parts[0].copy()
+
+    def __getitem__(self, k):
+        if k < 0:
+            k += self._count
+        if not self.first <= k < self._count:
+            raise IndexError("step not available")
+        return Step(*self.records(k, k + 1)[0].tolist())
+
+    def __iter__(self):
+        for start in range(self.first, self._count, self.capacity):
+            for record in self.records(start, start + self.capacity).tolist():
+                yield Step(*record)
+
+    def state(self, k, supply, demand):
+        # Allocation matrix and remaining supply and demand after step k, given
+        # the balanced supply and demand the method started from. Needs every
+        # step up to k, so it isn't available once a ring buffer has wrapped.
+        if self.first > 0:
+            raise IndexError("early steps have been overwritten")
+        allocation = [[0] * len(demand) for _ in range(len(supply))]
+        supply = list(supply)
+        demand = list(demand)
+        for start in range(0, k + 1, self.capacity):
+            for i, j, amount, supply_left, demand_left in self.records(start, min(start + self.capacity, k + 1)).tolist():
+                allocation[i][j] = amount
+                supply[i] = supply_left
+                demand[j] = demand_left
+        return allocation, supply, demand
+
+    def close(self):
+        if self._file is not None:
+            self._file.close()
+            self._file = None
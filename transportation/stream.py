@@ -0,0 +1,497 @@
+"""Out-of-core solving for cost matrices too large to hold in memory.
+
+The costs are read a block of rows at a time, from a memory-mapped array
+(such as files.load_problem gives for .npy files) or from any iterable of
+row blocks, which is first spilled to a temporary file on disk:
+
+    supply, demand, costs = files.load_problem("huge.npy")
+    solution = solve_stream(supply, demand, costs, VOGEL)
+
+The NorthWest corner method walks the matrix in row-major order, so it reads
+each block once and stops as soon as every amount is placed. The Least Cost
+Method and Vogel's Approximation Method only ever look at the cheapest live
+cells of a line, so a first pass keeps the CANDIDATES cheapest cells of every
+row and every column, and the methods run from those lists. A line whose
+list runs out is refilled from the cheapest of its cells that are still
+live: rows are read back directly, columns in one more pass over the rows,
+shared by every column that ran out at the same time. Memory use is a few
+blocks plus (rows + columns) * CANDIDATES cells, and the solutions are the
+same as those of the in-memory methods, ties included.
+"""
+
+import heapq
+import os
+import tempfile
+
+import numpy as np
+
+from . import solver
+from .lanes import Lanes
+from .numeric import as_numbers, shortfall, tolerance
+from .trace import phase
+from .vogel import INF
+
+# Cheapest cells kept per row and column for the Least Cost and Vogel's
+# methods; more means fewer refills but more memory.
+CANDIDATES = 32
+
+# Share of a column's candidates below which it is refilled along with
+# columns that have run out.
+LOW_CANDIDATES = 0.5
+
+# Cells read per block of rows.
+BLOCK_CELLS = 1 << 22
+
+STREAM_METHODS = (solver.NORTHWEST, solver.LEAST_COST, solver.VOGEL)
+
+
+class CostSource:
+    # A cost matrix of the given (rows, columns) shape read in blocks of
+    # rows, and seen as balanced: dummy_row or dummy_column adds a line of
+    # zero costs. costs is an array, memory-mapped or not, or an iterable of
+    # 2-D row blocks, which is written to a temporary file as it is read.
+    def __init__(self, costs, shape, dummy_row=False, dummy_column=False, block_rows=None):
+        n, m = shape
+        self._spill = None
+        if not hasattr(costs, "shape"):
+            costs = self._spill_blocks(costs, shape)
+        self.costs = costs
+        try:
+            if tuple(costs.shape) != (n, m):
+                raise ValueError(f"The cost matrix is {costs.shape[0]}x{costs.shape[1]}, expected {n}x{m}.")
+            if costs.dtype.kind not in "biuf":
+                raise ValueError(f"Streamed costs must be numbers, not {costs.dtype}.")
+        except ValueError:
+            self.close()
+            raise
+        self.n, self.m = n, m
+        self.dummy_row = dummy_row
+        self.shape = (n + dummy_row, m + dummy_column)
+        self.dtype = np.dtype(np.float64 if costs.dtype.kind == "f" else np.int64)
+        self.block_rows = block_rows or max(1, BLOCK_CELLS // max(1, self.shape[1]))
+
+    def _spill_blocks(self, blocks, shape):
+        n, m = shape
+        handle, path = tempfile.mkstemp(suffix=".npy")
+        os.close(handle)
+        self._spill = path
+        table = None
+        rows = 0
+        try:
+            for block in blocks:
+                block = np.asarray(block)
+                if block.ndim != 2 or block.shape[1] != m or rows + len(block) > n:
+                    raise ValueError(f"Cost blocks must be rows of {m} columns, {n} rows in all.")
+                if table is None:
+                    table = np.lib.format.open_memmap(path, mode="w+", dtype=block.dtype, shape=shape)
+                table[rows:rows + len(block)] = block
+                rows += len(block)
+            if rows != n:
+                raise ValueError(f"The cost blocks hold {rows} rows, expected {n}.")
+            table.flush()
+        except BaseException:
+            # Nothing is left behind when the blocks can't be used
+            del table
+            self.close()
+            raise
+        del table
+        return np.load(path, mmap_mode="r")
+
+    def close(self):
+        # Remove the temporary file, if the costs were spilled to one.
+        if self._spill is not None:
+            self.costs = None
+            os.remove(self._spill)
+            self._spill = None
+
+    def blocks(self):
+        # (first row, block) for consecutive blocks of balanced rows.
+        n, m = self.n, self.m
+        for lo in range(0, n, self.block_rows):
+            hi = min(lo + self.block_rows, n)
+            block = np.zeros((hi - lo, self.shape[1]), dtype=self.dtype)
+            block[:, :m] = self.costs[lo:hi]
+            yield lo, block
+        if self.dummy_row:
+            yield n, np.zeros((1, self.shape[1]), dtype=self.dtype)
+
+    def rows(self, index):
+        # The balanced rows listed in index, in that order.
+        index = np.asarray(index)
+        block = np.zeros((len(index), self.shape[1]), dtype=self.dtype)
+        real = index < self.n
+        if real.any():
+            block[real, :self.m] = self.costs[index[real]]
+        return block
+
+
+def _item(value):
+    return value.item() if isinstance(value, np.generic) else value
+
+
+def _smallest(block, k):
+    # Positions and values of the k cheapest entries of every row of block,
+    # ordered by cost and then position like a stable sort.
+    count, width = block.shape
+    if k >= width:
+        order = np.argsort(block, axis=1, kind="stable")
+    else:
+        kth = np.partition(block, k - 1, axis=1)[:, k - 1:k]
+        below = block < kth
+        tied = block == kth
+        take = below | (tied & (np.cumsum(tied, axis=1) <= k - below.sum(axis=1, keepdims=True)))
+        chosen = np.nonzero(take)[1].reshape(count, k)
+        values = np.take_along_axis(block, chosen, axis=1)
+        order = np.take_along_axis(chosen, np.argsort(values, axis=1, kind="stable"), axis=1)
+    return order, np.take_along_axis(block, order, axis=1)
+
+
+def _merge(index, values, more_index, more_values, k):
+    # Keep the k cheapest of two candidate lists per line, the first list
+    # winning ties since it holds the lower positions.
+    index = np.concatenate([index, more_index], axis=1)
+    values = np.concatenate([values, more_values], axis=1)
+    order = np.argsort(values, axis=1, kind="stable")[:, :k]
+    return np.take_along_axis(index, order, axis=1), np.take_along_axis(values, order, axis=1)
+
+
+class _Candidates:
+    # The cheapest cells of every line in one direction, in the order of a
+    # stable sort by cost. index[k, :length[k]] are the other lines of those
+    # cells and values their costs. A complete list held every cell of the
+    # line that was live when it was filled.
+    def __init__(self, index, values, complete):
+        self.index = index
+        self.values = values
+        self.length = np.full(len(index), index.shape[1], dtype=np.intp)
+        self.complete = complete
+
+    def fill(self, lines, index, values, live_count):
+        width = index.shape[1]
+        self.index[lines, :width] = index
+        self.values[lines, :width] = values
+        self.length[lines] = width
+        self.complete[lines] = live_count <= self.index.shape[1]
+
+
+def _candidates(source, k, trace, columns=True):
+    # One pass over the costs for the k cheapest cells of every row and, if
+    # columns, of every column, and the largest cost.
+    n, m = source.shape
+    k_rows, k_cols = min(k, m), min(k, n)
+    row_index = np.empty((n, k_rows), dtype=np.intp)
+    row_values = np.empty((n, k_rows), dtype=source.dtype)
+    col_index = np.empty((m, 0), dtype=np.intp)
+    col_values = np.empty((m, 0), dtype=source.dtype)
+    largest = None
+    with phase(trace, "candidates"):
+        for lo, block in source.blocks():
+            hi = lo + len(block)
+            row_index[lo:hi], row_values[lo:hi] = _smallest(block, k_rows)
+            if columns:
+                index, values = _smallest(block.T, min(k_cols, len(block)))
+                col_index, col_values = _merge(col_index, col_values, index + lo, values, k_cols)
+            top = block.max()
+            largest = top if largest is None else max(largest, top)
+            if trace is not None:
+                trace.count("scans", block.size)
+    rows = _Candidates(row_index, row_values, np.full(n, k_rows == m))
+    cols = _Candidates(col_index, col_values, np.full(m, k_cols == n))
+    return rows, cols, largest
+
+
+def _refill_rows(source, rows, lines, col_live, trace):
+    # Read the rows back. Returns the lines refilled.
+    live = np.flatnonzero(col_live)
+    index, values = _smallest(source.rows(lines)[:, live], min(rows.index.shape[1], len(live)))
+    rows.fill(lines, live[index], values, len(live))
+    if trace is not None:
+        trace.count("refills", len(lines))
+    return lines
+
+
+def _refill_cols(source, cols, lines, row_live, col_live, trace):
+    # One more pass over the rows, keeping only the live ones. Every live
+    # column down to its last few candidates is refilled in the same pass,
+    # since each pass reads the whole matrix. Returns the lines refilled.
+    width = cols.index.shape[1]
+    remaining = (row_live[cols.index] & (np.arange(width) < cols.length[:, None])).sum(axis=1)
+    low = np.flatnonzero(col_live & ~cols.complete & (remaining < LOW_CANDIDATES * width))
+    lines = np.union1d(lines, low)
+    k = min(width, int(row_live.sum()))
+    index = np.empty((len(lines), 0), dtype=np.intp)
+    values = np.empty((len(lines), 0), dtype=source.dtype)
+    with phase(trace, "refill columns"):
+        for lo, block in source.blocks():
+            live = np.flatnonzero(row_live[lo:lo + len(block)])
+            if not len(live):
+                continue
+            more_index, more_values = _smallest(block[np.ix_(live, lines)].T, min(k, len(live)))
+            index, values = _merge(index, values, live[more_index] + lo, more_values, k)
+    cols.fill(lines, index, values, int(row_live.sum()))
+    if trace is not None:
+        trace.count("refills", len(lines))
+    return lines
+
+
+def northwest_stream(supply, demand, source, on_step=None, trace=None):
+    # NorthWest corner method in one pass over the blocks of a balanced
+    # problem; supply and demand are lists consumed in place.
+    n, m = source.shape
+    i = j = 0
+    rows, cols, amounts = [], [], []
+    total_cost = 0
+    iterations = 0
+    with phase(trace, "allocate"):
+        for lo, block in source.blocks():
+            if trace is not None:
+                trace.count("scans", block.size)
+            while i < lo + len(block) and j < m:
+                allocated = min(supply[i], demand[j])
+                rows.append(i)
+                cols.append(j)
+                amounts.append(allocated)
+                supply[i] -= allocated
+                demand[j] -= allocated
+                total_cost += allocated * block[i - lo, j].item()
+                iterations += 1
+                if trace is not None:
+                    trace.count("allocations")
+                if on_step is not None:
+                    on_step(i, j, allocated, supply, demand)
+                if supply[i] == 0:
+                    i += 1
+                else:
+                    j += 1
+            if i >= n or j >= m:
+                break
+    return Lanes(rows, cols, amounts, (n, m)), total_cost, iterations
+
+
+def least_cost_stream(supply, demand, source, on_step=None, candidates=CANDIDATES, trace=None):
+    # Least Cost Method over a balanced problem. Every live row has its
+    # cheapest candidate on a heap ordered like the stable sort of
+    # least_cost, so the top of the heap is the cheapest live cell once
+    # entries whose column has run out are moved along.
+    supply = as_numbers(supply, len(supply))
+    demand = as_numbers(demand, len(demand))
+    n, m = source.shape
+    tol = tolerance(supply)
+    rows, _, _ = _candidates(source, candidates, trace, columns=False)
+    cursor = np.zeros(n, dtype=np.intp)
+
+    def push(i):
+        # Put row i's cheapest live cell on the heap, refilling its list
+        # if every candidate's column has run out.
+        while True:
+            k = int(cursor[i])
+            length = int(rows.length[i])
+            index = rows.index[i]
+            while k < length and not demand[index[k]] > tol:
+                k += 1
+            cursor[i] = k
+            if k < length:
+                heapq.heappush(heap, (rows.values[i, k].item(), i, int(index[k])))
+                return
+            if rows.complete[i]:
+                return
+            _refill_rows(source, rows, np.array([i]), demand > tol, trace)
+            cursor[i] = 0
+
+    heap = []
+    for i in np.flatnonzero(supply > tol).tolist():
+        push(i)
+
+    cell_rows, cell_cols, amounts = [], [], []
+    total_cost = 0
+    remaining = supply.sum()
+    iterations = 0
+    with phase(trace, "allocate"):
+        while heap and remaining > tol:
+            cost, i, j = heapq.heappop(heap)
+            if not supply[i] > tol:
+                continue
+            if not demand[j] > tol:
+                push(i)
+                continue
+            amount = min(supply[i], demand[j])
+            cell_rows.append(i)
+            cell_cols.append(j)
+            amounts.append(amount)
+            supply[i] -= amount
+            demand[j] -= amount
+            remaining -= amount
+            total_cost += _item(amount) * cost
+            iterations += 1
+            if trace is not None:
+                trace.count("allocations")
+            if on_step is not None:
+                on_step(i, j, amount, supply, demand)
+            if supply[i] > tol:
+                push(i)
+
+    allocation = Lanes(cell_rows, cell_cols, np.array(amounts, dtype=supply.dtype), (n, m))
+    return allocation, total_cost, iterations
+
+
+class _Lines:
+    # Penalties of one direction from its candidate lists, following
+    # vogel._Lines: first and second point at the cheapest two live cells
+    # and reaching the end of an incomplete list refills it.
+    def __init__(self, candidates, live, other_live, sentinel_cost, refill):
+        self.candidates = candidates
+        self.live = live
+        self.other_live = other_live
+        self.sentinel_cost = sentinel_cost
+        self.refill = refill
+        count = len(live)
+        self.first = np.zeros(count, dtype=np.intp)
+        self.second = np.ones(count, dtype=np.intp)
+        self.penalty = np.empty(count, dtype=candidates.values.dtype)
+        self.refresh(np.arange(count))
+
+    def cheapest(self, line):
+        return self.candidates.index[line, self.first[line]]
+
+    def refresh(self, lines):
+        c = self.candidates
+        self._advance(self.first, lines)
+        self.second[lines] = np.maximum(self.second[lines], self.first[lines] + 1)
+        self._advance(self.second, lines)
+        short = lines[~c.complete[lines] & (self.second[lines] >= c.length[lines])]
+        if len(short):
+            # Refilled lists hold live cells only; more lines than asked for
+            # may have been refilled
+            refilled = self.refill(short, self.other_live)
+            self.first[refilled] = 0
+            self.second[refilled] = 1
+            self._advance(self.second, refilled)
+            lines = np.union1d(lines, refilled)
+
+        first = self.first[lines]
+        second = self.second[lines]
+        length = c.length[lines]
+        has_first = first < length
+        has_second = second < length
+        values = c.values[lines]
+        cheapest = np.take_along_axis(values, np.minimum(first, values.shape[1] - 1)[:, None], axis=1)[:, 0]
+        runner_up = np.take_along_axis(values, np.minimum(second, values.shape[1] - 1)[:, None], axis=1)[:, 0]
+        penalty = np.where(has_second, runner_up, self.sentinel_cost) - cheapest
+        penalty[~has_first] = -1
+        self.penalty[lines] = penalty
+
+    def _advance(self, cursor, lines):
+        c = self.candidates
+        while len(lines):
+            at = cursor[lines]
+            inside = at < c.length[lines]
+            lines = lines[inside]
+            at = at[inside]
+            dead = ~self.other_live[c.index[lines, at]]
+            lines = lines[dead]
+            cursor[lines] += 1
+
+    def remove(self, line, others):
+        self.live[line] = False
+        self.penalty[line] = -1
+        c = others.candidates
+        live = np.flatnonzero(others.live)
+        width = c.index.shape[1]
+        first, second = others.first[live], others.second[live]
+        hit = (((first < c.length[live]) & (c.index[live, np.minimum(first, width - 1)] == line))
+               | ((second < c.length[live]) & (c.index[live, np.minimum(second, width - 1)] == line)))
+        others.refresh(live[hit])
+        return int(hit.sum())
+
+
+def vogel_stream(supply, demand, source, on_step=None, candidates=CANDIDATES, trace=None):
+    # Vogel's Approximation Method over a balanced problem, choosing the
+    # same cells as vogel.vogel.
+    supply = as_numbers(supply, len(supply))
+    demand = as_numbers(demand, len(demand))
+    n, m = source.shape
+    # Penalties need the two cheapest cells of a line
+    row_candidates, col_candidates, largest = _candidates(source, max(2, candidates), trace)
+    sentinel_cost = max(INF, largest)
+
+    row_live = np.ones(n, dtype=bool)
+    col_live = np.ones(m, dtype=bool)
+    rows = _Lines(row_candidates, row_live, col_live, sentinel_cost,
+                  lambda lines, live: _refill_rows(source, row_candidates, lines, live, trace))
+    cols = _Lines(col_candidates, col_live, row_live, sentinel_cost,
+                  lambda lines, live: _refill_cols(source, col_candidates, lines, live, col_live, trace))
+
+    cell_rows, cell_cols, amounts = [], [], []
+    total_cost = 0
+    remaining = supply.sum()
+    tol = tolerance(supply)
+    iterations = 0
+    with phase(trace, "allocate"):
+        while remaining > tol and iterations < n + m:
+            i = int(np.argmax(rows.penalty))
+            j = int(np.argmax(cols.penalty))
+            if rows.penalty[i] >= cols.penalty[j]:
+                j = int(rows.cheapest(i))
+                cost = row_candidates.values[i, rows.first[i]]
+            else:
+                i = int(cols.cheapest(j))
+                cost = col_candidates.values[j, cols.first[j]]
+
+            amount = min(supply[i], demand[j])
+            cell_rows.append(i)
+            cell_cols.append(j)
+            amounts.append(amount)
+            supply[i] -= amount
+            demand[j] -= amount
+            remaining -= amount
+            total_cost += _item(amount) * cost.item()
+            iterations += 1
+
+            if demand[j] <= tol:
+                refreshed = cols.remove(j, rows)
+            else:
+                refreshed = rows.remove(i, cols)
+            if trace is not None:
+                trace.count("allocations")
+                trace.count("scans", n + m + refreshed)
+            if on_step is not None:
+                on_step(i, j, amount, supply, demand)
+
+    allocation = Lanes(cell_rows, cell_cols, np.array(amounts, dtype=supply.dtype), (n, m))
+    return allocation, total_cost, iterations
+
+
+def solve_stream(supply, demand, costs, method=solver.VOGEL, on_step=None, candidates=CANDIDATES,
+                 block_rows=None, trace=None):
+    # Balance the problem and solve it without loading the costs, which may
+    # be a (memory-mapped) array or an iterable of row blocks. Returns a
+    # solver.Solution like solver.solve.
+    if method not in STREAM_METHODS:
+        raise ValueError(f"Only {', '.join(STREAM_METHODS)} can be solved from streamed costs.")
+    if candidates < 1:
+        raise ValueError("At least one candidate per line is needed.")
+    supply, demand = list(supply), list(demand)
+    shape = (len(supply), len(demand))
+    # A read-only view of one zero stands in for the costs here
+    solver.check_problem(supply, demand, np.broadcast_to(0, shape))
+    difference = shortfall(supply, demand)
+    if difference > 0:
+        supply.append(difference)
+    elif difference < 0:
+        demand.append(-difference)
+    source = None
+    try:
+        source = CostSource(costs, shape, difference > 0, difference < 0, block_rows)
+        with phase(trace, "solve", method=method):
+            if method == solver.NORTHWEST:
+                allocation, total_cost, iterations = northwest_stream(supply, demand, source, on_step, trace)
+            elif method == solver.LEAST_COST:
+                allocation, total_cost, iterations = least_cost_stream(supply, demand, source, on_step,
+                                                                       candidates, trace)
+            else:
+                allocation, total_cost, iterations = vogel_stream(supply, demand, source, on_step, candidates,
+                                                                  trace)
+    finally:
+        if source is not None:
+            source.close()
+    return solver.Solution(method, allocation, total_cost, iterations)
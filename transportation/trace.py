@@ -0,0 +1,131 @@
+"""Opt-in timing and counting of where the solving methods spend their time.
+
+Pass a Trace as ``trace=`` to solver.solve and every phase of the solve is
+recorded as a timed event: balancing, sorting the costs, the allocation
+loop, and MODI's or Network Simplex's pricing and pivots. Counters add up
+the cells scanned, sorts, allocations and pivots. Without a trace the
+methods only test for None, so solving is no slower.
+
+A trace is saved as Chrome trace JSON, which chrome://tracing and Perfetto
+open as a timeline, or with a .prof or .pstats extension as a profile that
+``pstats.Stats`` reads, one entry per phase.
+"""
+
+import json
+import marshal
+import os
+import threading
+import time
+from collections import Counter
+from contextlib import contextmanager, nullcontext
+
+TRACE_FORMATS = (".json", ".prof", ".pstats")
+
+# Stands in for the file name in pstats entries, which are keyed by
+# (file, line, function).
+PSTATS_FILE = "transportation"
+
+
+class Trace:
+    # Events are Chrome trace "complete" events with timestamps in
+    # microseconds since the trace was created. on_event, if given, is
+    # called with each event as it is recorded. Phases nest per thread.
+    def __init__(self, on_event=None):
+        self.on_event = on_event
+        self.events = []
+        self.counters = Counter()
+        self._origin = time.perf_counter()
+        self._stats = {}
+        self._local = threading.local()
+
+    clock = staticmethod(time.perf_counter)
+
+    def count(self, name, amount=1):
+        self.counters[name] += amount
+
+    @contextmanager
+    def phase(self, name, **args):
+        # Time the body of the with block as a phase. args are shown with
+        # the event in the trace viewer.
+        stack = self._stack()
+        stack.append([name, 0.0])
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            inner = stack.pop()[1]
+            self._record(name, start, inner, args)
+
+    def span(self, name, start, **args):
+        # Record a phase that ran from start, a clock() reading, until now.
+        # Cheaper than phase() inside loops, but nothing may nest in it.
+        self._record(name, start, 0.0, args)
+
+    def seconds(self):
+        # Total seconds spent in each phase.
+        return {name: stats[3] for name, stats in self._stats.items()}
+
+    def save(self, path):
+        extension = os.path.splitext(path)[1].lower()
+        if extension not in TRACE_FORMATS:
+            raise ValueError(f"Unsupported trace format {extension!r}; use one of {', '.join(TRACE_FORMATS)}.")
+        if extension == ".json":
+            with open(path, "w") as f:
+                json.dump(self.chrome_trace(), f)
+        else:
+            with open(path, "wb") as f:
+                marshal.dump(self.pstats(), f)
+
+    def chrome_trace(self):
+        # The events, followed by the final value of every counter.
+        end = (time.perf_counter() - self._origin) * 1e6
+        counters = [{"name": name, "cat": "transportation", "ph": "C", "ts": end, "pid": os.getpid(),
+                     "tid": 0, "args": {name: value}} for name, value in self.counters.items()]
+        return {"traceEvents": self.events + counters, "displayTimeUnit": "ms"}
+
+    def pstats(self):
+        # The phases as the dict pstats.Stats loads from a profile: calls,
+        # own and total seconds, and the same for each phase it ran inside.
+        stats = {}
+        for name, (calls, own, callers, total) in self._stats.items():
+            callers = {(PSTATS_FILE, 0, caller): tuple(values) for caller, values in callers.items()}
+            stats[PSTATS_FILE, 0, name] = (calls, calls, own, total, callers)
+        return stats
+
+    def _stack(self):
+        stack = getattr(self._local, "stack", None)
+        if stack is None:
+            stack = self._local.stack = []
+        return stack
+
+    def _record(self, name, start, inner, args):
+        end = time.perf_counter()
+        seconds = end - start
+        stack = self._stack()
+        caller = stack[-1][0] if stack else None
+        if stack:
+            stack[-1][1] += seconds
+
+        stats = self._stats.setdefault(name, [0, 0.0, {}, 0.0])
+        stats[0] += 1
+        stats[1] += seconds - inner
+        stats[3] += seconds
+        if caller is not None:
+            calls = stats[2].setdefault(caller, [0, 0, 0.0, 0.0])
+            calls[0] += 1
+            calls[1] += 1
+            calls[2] += seconds - inner
+            calls[3] += seconds
+
+        event = {"name": name, "cat": "transportation", "ph": "X", "ts": (start - self._origin) * 1e6,
+                 "dur": seconds * 1e6, "pid": os.getpid(), "tid": threading.get_ident()}
+        if args:
+            event["args"] = args
+        self.events.append(event)
+        if self.on_event is not None:
+            self.on_event(event)
+
+
+def phase(trace, name, **args):
+    # trace.phase(name), or nothing at all without a trace.
+    return nullcontext() if trace is None else trace.phase(name, **args)
@@ -0,0 +1,174 @@
+"""Vectorized Vogel's Approximation Method.
+
+Every row and column keeps its cells pre-sorted by cost together with two
+cursors pointing at its cheapest and second cheapest live cells. Eliminating
+a line only moves the cursors of the lines that pointed at it, so penalties
+are maintained incrementally instead of re-sorting the whole matrix on every
+allocation.
+
+Ties are broken like the original list-based implementation: rows win over
+columns on equal penalties, the first line with the largest penalty is
+picked and the first cheapest cell in that line gets the allocation.
+"""
+
+import numpy as np
+
+from .lanes import Lanes
+from .numeric import as_numbers, tolerance, total_cost
+from .trace import phase
+
+# Cost used in place of a missing second cheapest cell, so that a line with a
+# single live cell gets a penalty of INF - cost. Problems with costs above INF
+# use their largest cost instead, which keeps every live line's penalty above
+# the -1 of eliminated lines.
+INF = 10 ** 3
+
+
+class _Lines:
+    # Sorted cells and cursors for one direction (all rows or all columns).
+    # order[k] lists the cells of line k by increasing cost and ends with a
+    # sentinel that is always live, so cursors never run off the end.
+    def __init__(self, order, values, live, other_live, dtype):
+        self.order = order
+        self.values = values
+        self.live = live
+        self.other_live = other_live
+        count = order.shape[0]
+        self.first = np.zeros(count, dtype=np.intp)
+        self.second = np.ones(count, dtype=np.intp)
+        self.penalty = np.empty(count, dtype=dtype)
+        self.sentinel = order.shape[1] - 1
+        self.refresh(np.arange(count))
+
+    def cheapest(self, line):
+        return self.order[line, self.first[line]]
+
+    def refresh(self, lines):
+        # Move the cursors of the given lines past dead cells and recompute
+        # their penalties.
+        self._advance(self.first, lines)
+        self.second[lines] = np.maximum(self.second[lines], self.first[lines] + 1)
+        self._advance(self.second, lines)
+
+        first = self.first[lines]
+        second = np.minimum(self.second[lines], self.sentinel)
+        penalty = self.values(lines, second) - self.values(lines, first)
+        penalty[first == self.sentinel] = -1
+        self.penalty[lines] = penalty
+
+    def _advance(self, cursor, lines):
+        while len(lines):
+            at = np.minimum(cursor[lines], self.sentinel)
+            cursor[lines] = at
+            dead = ~self.other_live[self.order[lines, at]]
+            lines = lines[dead]
+            cursor[lines] += 1
+
+    def remove(self, line, others):
+        # Eliminate one line and refresh the lines of the other direction
+        # whose two cheapest cells included it. Returns how many were.
+        self.live[line] = False
+        self.penalty[line] = -1
+        live = np.flatnonzero(others.live)
+        hit = ((others.order[live, others.first[live]] == line)
+               | (others.order[live, np.minimum(others.second[live], others.sentinel)] == line))
+        others.refresh(live[hit])
+        return int(hit.sum())
+
+
+def line_orders(cost):
+    # The cells of every row and of every column by increasing cost, each
+    # ended by the index of the sentinel.
+    n, m = cost.shape
+    row_order = np.empty((n, m + 1), dtype=np.intp)
+    row_order[:, :m] = np.argsort(cost, axis=1, kind="stable")
+    row_order[:, m] = m
+    col_order = np.empty((m, n + 1), dtype=np.intp)
+    col_order[:, :n] = np.argsort(cost, axis=0, kind="stable").T
+    col_order[:, n] = n
+    return row_order, col_order
+
+
+def vogel(supply, demand, cost_matrix, on_step=None, trace=None, orders=None):
+    # Solve a balanced problem. supply and demand are consumed in place when
+    # they are NumPy arrays; the allocation is returned as Lanes holding the
+    # allocated cells. orders, if given, is line_orders(cost_matrix) computed
+    # beforehand, for solving many problems with the same costs; it is only
+    # read.
+    supply = as_numbers(supply, len(supply))
+    demand = as_numbers(demand, len(demand))
+    cost = as_numbers(cost_matrix, 2)
+    n, m = cost.shape
+
+    # What the sentinel at the end of every sorted line costs, see INF.
+    dtype = cost.dtype
+    sentinel_cost = max(INF, cost.max())
+
+    if orders is None:
+        with phase(trace, "sort"):
+            orders = line_orders(cost)
+        if trace is not None:
+            trace.count("sorts", 2)
+    row_order, col_order = orders
+
+    row_live = np.ones(n + 1, dtype=bool)
+    col_live = np.ones(m + 1, dtype=bool)
+
+    def row_values(k, p):
+        j = row_order[k, p]
+        return np.where(j == m, sentinel_cost, cost[k, np.minimum(j, m - 1)])
+
+    def col_values(k, p):
+        i = col_order[k, p]
+        return np.where(i == n, sentinel_cost, cost[np.minimum(i, n - 1), k])
+
+    with phase(trace, "penalties"):
+        rows = _Lines(row_order, row_values, row_live[:n], col_live, dtype)
+        cols = _Lines(col_order, col_values, col_live[:m], row_live, dtype)
+
+    # Every allocation eliminates a line, so there are at most n + m of them.
+    cell_rows = np.empty(n + m, dtype=np.intp)
+    cell_cols = np.empty(n + m, dtype=np.intp)
+    amounts = np.empty(n + m, dtype=np.result_type(supply.dtype, demand.dtype))
+    remaining = supply.sum()
+    tol = tolerance(supply)
+    iterations = 0
+
+    with phase(trace, "allocate"):
+        while remaining > tol and iterations < n + m:
+            if trace is not None:
+                started = trace.clock()
+            i = int(np.argmax(rows.penalty))
+            j = int(np.argmax(cols.penalty))
+            if rows.penalty[i] >= cols.penalty[j]:
+                j = int(rows.cheapest(i))
+            else:
+                i = int(cols.cheapest(j))
+
+            amount = min(supply[i], demand[j])
+            cell_rows[iterations] = i
+            cell_cols[iterations] = j
+            amounts[iterations] = amount
+            supply[i] -= amount
+            demand[j] -= amount
+            remaining -= amount
+            iterations += 1
+            if trace is not None:
+                trace.span("select", started)
+                started = trace.clock()
+
+            # eliminate the column if its demand is met, otherwise the row
+            if demand[j] <= tol:
+                refreshed = cols.remove(j, rows)
+            else:
+                refreshed = rows.remove(i, cols)
+            if trace is not None:
+                trace.span("update penalties", started)
+                trace.count("allocations")
+                trace.count("scans", n + m + refreshed)
+
+            if on_step is not None:
+                on_step(i, j, amount, supply, demand)
+
+    allocation = Lanes(cell_rows[:iterations], cell_cols[:iterations], amounts[:iterations], (n, m))
+    return allocation, total_cost(allocation.rows, allocation.cols, allocation.values, cost), iterations
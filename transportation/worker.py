@@ -0,0 +1,123 @@
+"""Solving on a background thread with progress reports and cancellation.
+
+Tk widgets may only be touched from the main thread, so the worker never
+calls into the GUI. It puts messages on its queue instead, and the GUI polls
+that queue with ``root.after``:
+
+    ("progress", allocations, supply_left, pivots)
+    ("done", solution)
+    ("cancelled",)
+    ("error", exception)
+
+Cancelling is cooperative: the worker stops at the next allocation or pivot.
+A CompareWorker runs every starting method on a process pool and posts no
+progress, only the final message, with a compare.Comparison when done.
+"""
+
+import queue
+import threading
+import time
+
+from . import solver
+from .compare import compare
+from .solver import Cancelled
+
+# Least number of seconds between two progress messages.
+PROGRESS_INTERVAL = 0.1
+
+
+class SolveWorker(threading.Thread):
+    # With a cache.SolutionCache the solution always comes out optimal, and
+    # is looked up or warm-started from earlier solves where possible. A
+    # trace.Trace records the solve's phases; it must not be used elsewhere
+    # until the worker is done.
+    def __init__(self, supply, demand, cost_matrix, method, on_step=None, optimize=False, cache=None,
+                 trace=None):
+        super().__init__(daemon=True)
+        self.problem = (supply, demand, cost_matrix)
+        self.method = method
+        self.on_step = on_step
+        self.optimize = optimize
+        self.cache = cache
+        self.trace = trace
+        self.messages = queue.Queue()
+        self.allocations = 0
+        self.supply_left = max(sum(supply), sum(demand))
+        self.pivots = 0
+        self._cancel = threading.Event()
+        self._posted = 0.0
+
+    def cancel(self):
+        self._cancel.set()
+
+    @property
+    def cancelled(self):
+        return self._cancel.is_set()
+
+    def run(self):
+        supply, demand, cost_matrix = self.problem
+        try:
+            if self.cache is not None:
+                solution = self.cache.solve(supply, demand, cost_matrix, self.method, self._step, self._pivot,
+                                            self.trace)
+            else:
+                solution = solver.solve(supply, demand, cost_matrix, self.method, self._step,
+                                        optimize=self.optimize, on_pivot=self._pivot, trace=self.trace)
+        except Cancelled:
+            self.messages.put(("cancelled",))
+        except Exception as e:
+            self.messages.put(("error", e))
+        else:
+            self._post()
+            self.messages.put(("done", solution))
+
+    def _step(self, i, j, amount, supply, demand):
+        if self.on_step is not None:
+            self.on_step(i, j, amount, supply, demand)
+        self.allocations += 1
+        self.supply_left -= amount
+        self._tick()
+
+    def _pivot(self, pivots):
+        self.pivots = pivots
+        self._tick()
+
+    def _tick(self):
+        if self._cancel.is_set():
+            raise Cancelled()
+        now = time.monotonic()
+        if now - self._posted >= PROGRESS_INTERVAL:
+            self._post(now)
+
+    def _post(self, now=None):
+        self._posted = time.monotonic() if now is None else now
+        self.messages.put(("progress", self.allocations, self.supply_left, self.pivots))
+
+
+class CompareWorker(threading.Thread):
+    def __init__(self, supply, demand, cost_matrix, optimize=True, processes=None):
+        super().__init__(daemon=True)
+        self.problem = (supply, demand, cost_matrix)
+        self.optimize = optimize
+        self.processes = processes
+        self.messages = queue.Queue()
+        self._cancel = threading.Event()
+
+    def cancel(self):
+        self._cancel.set()
+
+    @property
+    def cancelled(self):
+        return self._cancel.is_set()
+
+    def run(self):
+        supply, demand, cost_matrix = self.problem
+        try:
+            comparison = compare(supply, demand, cost_matrix, optimize=self.optimize,
+                                 processes=self.processes, cancel=self._cancel)
+        except Cancelled:
+            self.messages.put(("cancelled",))
+        except Exception as e:
+            self.messages.put(("error", e))
+        else:
+            self.messages.put(("done", comparison))